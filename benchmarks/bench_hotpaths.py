@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import string
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(REPO_DIR, "pesuchatbot"))
+
+from engine import (build_matcher, build_response_table, compile_responses, generate_campus_response,
+                    get_response, load_response_table, load_responses, save_chat)
+from history import HistoryWriter, format_record
+from history_reader import HistoryReader
+from places import PlaceIndex
+
+# ====================================================================
+# --- HOT PATH BENCHMARKS ---
+# ====================================================================
+# Headless (no wx) benchmarks over synthetic, scalable workloads.  Every
+# result is one JSON object per line so runs can be diffed/compared:
+#   python benchmarks/bench_hotpaths.py --scale medium --output bench_output.txt
+
+SCALES = {
+    "small":  {"keywords": [10, 1000], "places": [10, 100], "lengths": [16, 256], "records": [1000], "calls": 500},
+    "medium": {"keywords": [10, 1000, 10000], "places": [10, 1000], "lengths": [16, 256, 2048], "records": [10000], "calls": 2000},
+    "large":  {"keywords": [10, 1000, 100000], "places": [10, 1000, 10000], "lengths": [16, 256, 2048], "records": [100000], "calls": 5000},
+}
+
+PLACE_KINDS = ["Block", "Lab", "Hall", "Library", "Court", "Hostel", "Field", "Auditorium", "Studio", "Office"]
+
+def random_word(rng, lo=4, hi=10):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(lo, hi)))
+
+def random_message(rng, length, keywords, hit_rate=0.5):
+    words = []
+    size = 0
+    while size < length:
+        words.append(random_word(rng, 2, 8))
+        size += len(words[-1]) + 1
+    if keywords and rng.random() < hit_rate:
+        words[rng.randrange(len(words))] = rng.choice(keywords)
+    return " ".join(words)[:length]
+
+def typo(rng, word):
+    if len(word) < 5:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:]
+
+def summarize(name, params, samples, extra=None):
+    samples = sorted(samples)
+    n = len(samples)
+    total = sum(samples)
+    result = {
+        "bench": name,
+        "params": params,
+        "n": n,
+        "total_s": total,
+        "ops_per_sec": n / total if total else None,
+        "mean_us": 1e6 * total / n,
+        "p50_us": 1e6 * samples[n // 2],
+        "p99_us": 1e6 * samples[min(n - 1, int(n * 0.99))],
+        "max_us": 1e6 * samples[-1],
+    }
+    if extra:
+        result.update(extra)
+    return result
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+# ---------------------- BENCHMARKS ----------------------
+def bench_get_response(rng, keywords_n, length, calls):
+    keywords = list({random_word(rng) for _ in range(keywords_n)})
+    responses = {k: f"reply for {k}" for k in keywords}
+    start = time.perf_counter()
+    matcher = build_matcher(responses)
+    build_s = time.perf_counter() - start
+    messages = [random_message(rng, length, keywords) for _ in range(calls)]
+    samples = [timed(get_response, m, responses, matcher) for m in messages]
+    return summarize("get_response", {"keywords": keywords_n, "message_len": length}, samples, {"build_s": build_s})
+
+def synthetic_places(rng, n):
+    places = {}
+    while len(places) < n:
+        name = f"{random_word(rng).title()} {rng.choice(PLACE_KINDS)}"
+        places[name] = {"short": f"{name} on campus.", "directions": "Follow the main path."}
+    return places
+
+def bench_campus(rng, places_n, calls):
+    places = synthetic_places(rng, places_n)
+    start = time.perf_counter()
+    index = PlaceIndex(places)
+    build_s = time.perf_counter() - start
+    names = list(places)
+    queries = []
+    for _ in range(calls):
+        first = rng.choice(names).split()[0].lower()
+        queries.append(f"where is {typo(rng, first) if rng.random() < 0.3 else first}")
+    samples = [timed(generate_campus_response, q, index) for q in queries]
+    return summarize("generate_campus_response", {"places": places_n}, samples, {"build_s": build_s})
+
+def bench_load_responses(rng, keywords_n, tmpdir, repeats=5):
+    path = os.path.join(tmpdir, f"responses_{keywords_n}.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        for k in {random_word(rng) for _ in range(keywords_n)}:
+            f.write(f"{k}:Reply for {k} with a little more text to parse. 💚\n")
+    samples = [timed(load_responses, path) for _ in range(repeats)]
+    return summarize("load_responses", {"keywords": keywords_n}, samples)
+
+def bench_corpus(rng, keywords_n, tmpdir, repeats=3):
+    # cold table load: parse + matcher build vs. the compiled corpus
+    path = os.path.join(tmpdir, f"corpus_{keywords_n}.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        for k in {random_word(rng) for _ in range(keywords_n)}:
+            f.write(f"{k}:Reply for {k} with a little more text to parse. 💚\n")
+    start = time.perf_counter()
+    compile_responses(path)
+    compile_s = time.perf_counter() - start
+    samples = [timed(build_response_table, path) for _ in range(repeats)]
+    yield summarize("response_table_load", {"keywords": keywords_n, "source": "text"}, samples)
+    samples = [timed(load_response_table, path) for _ in range(repeats)]
+    yield summarize("response_table_load", {"keywords": keywords_n, "source": "corpus"}, samples, {"compile_s": compile_s})
+
+def bench_save_chat(rng, calls, tmpdir):
+    messages = [(random_message(rng, 40, None), random_message(rng, 80, None)) for _ in range(calls)]
+    path = os.path.join(tmpdir, "history_sync.txt")
+    samples = [timed(save_chat, u, b, path) for u, b in messages]
+    yield summarize("save_chat", {"mode": "sync"}, samples)
+
+    for policy in ("message", "interval", "shutdown"):
+        writer = HistoryWriter(os.path.join(tmpdir, f"history_{policy}.txt"), flush=policy)
+        start = time.perf_counter()
+        samples = [timed(writer.write, u, b) for u, b in messages]
+        writer.close()
+        drained_s = time.perf_counter() - start
+        yield summarize("save_chat", {"mode": "writer", "flush": policy}, samples, {"drained_s": drained_s})
+
+def bench_history_read(rng, records, calls, tmpdir):
+    path = os.path.join(tmpdir, f"history_{records}.txt")
+    t0 = datetime(2025, 1, 1)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(records):
+            now = t0 + timedelta(seconds=30 * i)
+            f.write(format_record(random_message(rng, 30, ["sad", "stress"]), random_message(rng, 60, None), now))
+
+    start = time.perf_counter()
+    reader = HistoryReader(path)
+    index_s = time.perf_counter() - start
+    span = 30 * records
+
+    def range_query():
+        a = t0 + timedelta(seconds=rng.randrange(span))
+        for _ in reader.exchanges(a, a + timedelta(hours=1)):
+            pass
+
+    samples = [timed(range_query) for _ in range(calls)]
+    yield summarize("history_range", {"records": records, "window": "1h"}, samples, {"index_s": index_s})
+
+    def search():
+        for _ in reader.search("stress"):
+            pass
+
+    samples = [timed(search) for _ in range(max(1, calls // 100))]
+    yield summarize("history_search", {"records": records, "needle": "stress"}, samples)
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(format_record("one more", "reply"))
+    yield summarize("history_refresh", {"records": records, "appended": 1}, [timed(reader.refresh)])
+    reader.close()
+
+def bench_startup(tmpdir, repeats=5):
+    # cold start of the terminal frontend, interpreter launch included
+    for name in ("responses.txt", "campus_map.json"):
+        src = os.path.join(REPO_DIR, name)
+        if os.path.exists(src):
+            shutil.copy(src, tmpdir)
+    cli = os.path.join(REPO_DIR, "pesuchatbot", "cli.py")
+    wall, in_process = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, cli, "--startup-only"], cwd=tmpdir,
+                              capture_output=True, text=True, check=True)
+        wall.append(time.perf_counter() - start)
+        in_process.append(json.loads(proc.stderr.strip().splitlines()[-1])["value"])
+    in_process.sort()
+    return summarize("startup_cli", {"repeats": repeats}, wall, {"import_to_prompt_p50_s": in_process[len(in_process) // 2]})
+
+# ---------------------- RUNNER ----------------------
+def run(scale, only, seed):
+    rng = random.Random(seed)
+    calls = scale["calls"]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if "get_response" in only:
+            for k in scale["keywords"]:
+                for length in scale["lengths"]:
+                    yield bench_get_response(rng, k, length, calls)
+        if "campus" in only:
+            for n in scale["places"]:
+                yield bench_campus(rng, n, calls)
+        if "load_responses" in only:
+            for k in scale["keywords"]:
+                yield bench_load_responses(rng, k, tmpdir)
+        if "corpus" in only:
+            for k in scale["keywords"]:
+                yield from bench_corpus(rng, k, tmpdir)
+        if "save_chat" in only:
+            yield from bench_save_chat(rng, calls, tmpdir)
+        if "history" in only:
+            for r in scale["records"]:
+                yield from bench_history_read(rng, r, calls, tmpdir)
+        if "startup" in only:
+            yield bench_startup(tmpdir)
+
+BENCHES = ["get_response", "campus", "load_responses", "corpus", "save_chat", "history", "startup"]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the chatbot hot paths (no display needed)")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--only", nargs="+", choices=BENCHES, default=BENCHES)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="append JSON lines here instead of stdout")
+    args = parser.parse_args()
+
+    out = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    meta = {
+        "bench": "_run",
+        "time": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+        "seed": args.seed,
+    }
+    out.write(json.dumps(meta) + "\n")
+    for result in run(SCALES[args.scale], set(args.only), args.seed):
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+    if out is not sys.stdout:
+        out.close()
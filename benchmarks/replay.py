@@ -0,0 +1,147 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(REPO_DIR, "pesuchatbot"))
+
+from bench_hotpaths import summarize
+from engine import HISTORY_FILE, REFLECTIVE_FALLBACKS, RESPONSES_FILE, load_response_table, respond
+from history_reader import HistoryReader
+
+# ====================================================================
+# --- HISTORY REPLAY / LOAD GENERATOR ---
+# ====================================================================
+# Turns chat_history.txt into a workload of (due time, user, recorded
+# bot reply) and drives the response engine with it from N processes:
+#   python benchmarks/replay.py                          # as fast as possible
+#   python benchmarks/replay.py --speed 1 --max-gap 2    # original pacing, idle gaps capped
+#   python benchmarks/replay.py --processes 8 --repeat 50
+# Requests are dealt round-robin, so every process sees the same mix and
+# the same pacing.  The report (one JSON line) has throughput, latency
+# percentiles and how often the replayed answer differs from the log:
+#   exact_match   replayed reply == recorded reply
+#   divergent     recorded reply is not even a possible answer today
+#                 (not in the winning keyword's replies, or in the
+#                 fallbacks when nothing matches) - a behaviour change,
+#                 as opposed to random.choice picking another variant.
+
+def load_workload(filename=HISTORY_FILE, start=None, end=None, speed=0.0, max_gap=None):
+    # [(due seconds from start, user, bot)]; due is 0 when speed is 0
+    workload = []
+    previous = None
+    due = 0.0
+    with HistoryReader(filename) as reader:
+        for exchange in reader.exchanges(start, end):
+            ts = exchange.timestamp.timestamp()
+            if speed and previous is not None:
+                gap = max(0.0, ts - previous)
+                if max_gap is not None:
+                    gap = min(gap, max_gap)
+                due += gap / speed
+            previous = ts
+            workload.append((due, exchange.user.strip(), exchange.bot.strip()))
+    return workload
+
+def _possible_replies(matcher, user):
+    hit = matcher.resolve(user.lower())
+    return REFLECTIVE_FALLBACKS if hit is None else hit[1]
+
+def run_shard(args):
+    # One worker process: replay its share of the workload against a
+    # table loaded in this process, starting at wall-clock time `t0`.
+    responses_file, shard, t0 = args
+    _, matcher = load_response_table(responses_file)
+    latencies, lags = [], []
+    sources = {}
+    exact = divergent = 0
+    examples = []
+    delay = t0 - time.time()
+    if delay > 0:
+        time.sleep(delay)
+    start = time.perf_counter()
+    for due, user, bot in shard:
+        wait = due - (time.perf_counter() - start)
+        if wait > 0:
+            time.sleep(wait)
+        lags.append(max(0.0, -wait))
+        begin = time.perf_counter()
+        source, reply = respond(user, matcher)
+        latencies.append(time.perf_counter() - begin)
+
+        sources[source] = sources.get(source, 0) + 1
+        if reply == bot:
+            exact += 1
+        elif bot not in _possible_replies(matcher, user):
+            divergent += 1
+            if len(examples) < 5:
+                examples.append({"user": user, "recorded": bot, "source": source})
+    return {"latencies": latencies, "lags": lags, "sources": sources,
+            "exact": exact, "divergent": divergent, "examples": examples}
+
+def replay(workload, processes=1, repeat=1, responses_file=RESPONSES_FILE):
+    span = workload[-1][0] if workload else 0.0
+    items = [(due + r * span, user, bot) for r in range(repeat) for due, user, bot in workload]
+    shards = [items[i::processes] for i in range(processes)]
+    # leave the pool time to spawn and load tables before the clock starts
+    t0 = time.time() + 0.5 + 0.1 * processes
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(run_shard, [(responses_file, shard, t0) for shard in shards])
+        wall = time.time() - t0
+
+    latencies, lags, sources, examples = [], [], {}, []
+    exact = divergent = 0
+    for result in results:
+        latencies.extend(result["latencies"])
+        lags.extend(result["lags"])
+        for source, count in result["sources"].items():
+            sources[source] = sources.get(source, 0) + count
+        exact += result["exact"]
+        divergent += result["divergent"]
+        examples.extend(result["examples"][:5 - len(examples)])
+
+    n = len(latencies)
+    lags.sort()
+    return summarize("replay", {"processes": processes, "repeat": repeat, "exchanges": len(workload)}, latencies, {
+        "wall_s": wall,
+        "throughput_rps": n / wall if wall > 0 else None,
+        # how far behind the original pacing the workers fell
+        "schedule_lag_p99_ms": 1e3 * lags[min(n - 1, int(n * 0.99))] if span else None,
+        "sources": sources,
+        "exact_match_rate": exact / n,
+        "divergent_rate": divergent / n,
+        "divergent_examples": examples,
+    })
+
+def parse_time(value):
+    return datetime.fromisoformat(value)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay chat_history.txt against the response engine")
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--responses", default=RESPONSES_FILE)
+    parser.add_argument("--start", type=parse_time, help="ISO time, only replay exchanges from here")
+    parser.add_argument("--end", type=parse_time, help="ISO time, only replay exchanges before this")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = original pacing, 10 = ten times faster, 0 = as fast as possible")
+    parser.add_argument("--max-gap", type=float, help="cap idle gaps between exchanges at this many seconds")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=1, help="replay the workload this many times back to back")
+    parser.add_argument("--output", help="append the JSON result here instead of stdout")
+    args = parser.parse_args()
+
+    workload = load_workload(args.history, args.start, args.end, args.speed, args.max_gap)
+    if not workload:
+        sys.exit(f"no exchanges in {args.history}")
+    result = replay(workload, args.processes, args.repeat, args.responses)
+    result["history"] = args.history
+    result["speed"] = args.speed
+    line = json.dumps(result, ensure_ascii=False) + "\n"
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(line)
+    else:
+        sys.stdout.write(line)
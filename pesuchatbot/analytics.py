@@ -0,0 +1,295 @@
+import argparse
+import json
+import os
+import sys
+import time
+import zipfile
+from datetime import date
+import numpy as np
+from corpus import tiers_digest
+from engine import HISTORY_FILE, RESPONSES_FILE, load_response_table, response_tiers
+from history_reader import HistoryReader
+from mood import MOODS, UNKNOWN, MoodModel
+
+# ====================================================================
+# --- MOOD ANALYTICS ---
+# ====================================================================
+# Columnar store over chat_history.txt, one row per exchange:
+#   day   int32  date.toordinal() of the exchange
+#   mood  int8   index into MOOD_LABELS (batched MoodModel label)
+#   key   int32  index into .keys of the keyword that answered the
+#                message, NO_KEY when the reply was a reflective fallback
+# update() reads only the records appended since the last call (the
+# HistoryReader index does the seeking), classifies them in batches and
+# appends to the arrays.  save() writes a checkpoint next to the log, so
+# a restart resumes from the last ingested record instead of re-reading
+# the whole log.  When the log was rotated (the last ingested record is
+# gone and the new file starts no earlier than it), the new file is read
+# from the top as a continuation and the existing rows are kept - the
+# rotated-away file cannot be re-read for them.  The rows are only
+# dropped when the response tables changed or the log was replaced with
+# older records.
+# Queries are one NumPy bincount over the rows in the requested range.
+#   python pesuchatbot/analytics.py --since 2025-11-01 --keys stress sad happy
+
+MOOD_LABELS = MOODS + [UNKNOWN]
+MOOD_IDS = {label: i for i, label in enumerate(MOOD_LABELS)}
+NO_KEY = -1
+CHECKPOINT_VERSION = 4
+BATCH = 50_000
+
+class MoodAnalytics:
+    def __init__(self, history_file=HISTORY_FILE, responses_file=RESPONSES_FILE, checkpoint=None):
+        self.history_file = history_file
+        self.checkpoint = checkpoint or history_file + ".analytics.npz"
+        responses, self.matcher = load_response_table(responses_file)
+        responses = dict(responses)
+        self.model = MoodModel.from_tables(responses)
+        self.digest = tiers_digest(response_tiers(responses)).hex()
+        self.reader = HistoryReader(history_file)
+        self._reset()
+        self.restored = self._load()
+
+    def __len__(self):
+        return self.size
+
+    def close(self):
+        self.reader.close()
+
+    @property
+    def day(self):
+        return self._day[:self.size]
+
+    @property
+    def mood(self):
+        return self._mood[:self.size]
+
+    @property
+    def key(self):
+        return self._key[:self.size]
+
+    def _reset(self):
+        self.keys = []
+        self._key_ids = {}
+        self.size = 0
+        self.consumed = 0     # records of the current log file ingested
+        self.sorted = True
+        self.last_offset = -1
+        self.last_ts = 0.0
+        self._day = np.empty(1024, np.int32)
+        self._mood = np.empty(1024, np.int8)
+        self._key = np.empty(1024, np.int32)
+
+    # ---------------------- INGEST ----------------------
+    def update(self):
+        # Ingests records appended since the last call; returns how many.
+        self.reader.refresh()
+        if not self._continues():
+            if self._rotated():
+                self.consumed = 0
+            else:
+                self._reset()
+        added = 0
+        while self.consumed < self.reader.count:
+            batch = list(self.reader.records(self.consumed, self.consumed + BATCH))
+            self._ingest(batch)
+            self.consumed += len(batch)
+            added += len(batch)
+        return added
+
+    def _continues(self):
+        # is the log still the one our last rows came from?
+        n = self.consumed
+        if not n:
+            return True
+        if self.reader.count < n:
+            return False
+        last = next(self.reader.records(n - 1, n))
+        return last.offset == self.last_offset and last.timestamp.timestamp() == self.last_ts
+
+    def _rotated(self):
+        # a fresh log that picks up where the old one stopped
+        if not self.reader.count:
+            return True
+        first = next(self.reader.records(0, 1))
+        return first.timestamp.timestamp() >= self.last_ts
+
+    def _key_id(self, hit):
+        if hit is None:
+            return NO_KEY
+        key = hit[1]
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            key_id = self._key_ids[key] = len(self.keys)
+            self.keys.append(key)
+        return key_id
+
+    def _ingest(self, batch):
+        n = len(batch)
+        users = [exchange.user for exchange in batch]
+        labels, _ = self.model.classify(users)
+        day = np.fromiter((exchange.timestamp.toordinal() for exchange in batch), np.int32, n)
+        mood = np.fromiter((MOOD_IDS[label] for label in labels), np.int8, n)
+        key = np.fromiter((self._key_id(self.matcher.match(user.lower())) for user in users), np.int32, n)
+        self._append(day, mood, key)
+        last = batch[-1]
+        self.last_offset = last.offset
+        self.last_ts = last.timestamp.timestamp()
+
+    def _append(self, day, mood, key):
+        start, end = self.size, self.size + len(day)
+        if end > len(self._day):
+            capacity = max(end, 2 * len(self._day))
+            for name in ("_day", "_mood", "_key"):
+                old = getattr(self, name)
+                new = np.empty(capacity, old.dtype)
+                new[:start] = old[:start]
+                setattr(self, name, new)
+        if self.sorted and len(day):
+            self.sorted = bool((np.diff(day) >= 0).all()) and (not start or day[0] >= self._day[start - 1])
+        self._day[start:end] = day
+        self._mood[start:end] = mood
+        self._key[start:end] = key
+        self.size = end
+
+    # ---------------------- CHECKPOINT ----------------------
+    def save(self):
+        tmp = self.checkpoint + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, version=np.int32(CHECKPOINT_VERSION), digest=np.array(self.digest),
+                     day=self.day, mood=self.mood, key=self.key, keys=np.array(self.keys, dtype=str),
+                     sorted=np.bool_(self.sorted), consumed=np.int64(self.consumed),
+                     last_offset=np.int64(self.last_offset),
+                     last_ts=np.float64(self.last_ts))
+        os.replace(tmp, self.checkpoint)
+
+    def _load(self):
+        try:
+            with np.load(self.checkpoint, allow_pickle=False) as data:
+                if int(data["version"]) != CHECKPOINT_VERSION or str(data["digest"]) != self.digest:
+                    return False
+                day, mood, key = data["day"], data["mood"], data["key"]
+                keys = data["keys"].tolist()
+                position = (bool(data["sorted"]), int(data["consumed"]),
+                            int(data["last_offset"]), float(data["last_ts"]))
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return False  # missing or unreadable: rebuild from the log
+        self.sorted, self.consumed, self.last_offset, self.last_ts = position
+        self.keys = keys
+        self._key_ids = {k: i for i, k in enumerate(keys)}
+        self._day, self._mood, self._key = day, mood, key
+        self.size = len(day)
+        return True
+
+    # ---------------------- QUERIES ----------------------
+    def _select(self, start, end):
+        # rows with start <= day < end, plus the day range [lo, hi)
+        day = self.day
+        lo = start.toordinal() if start else None
+        hi = end.toordinal() if end else None
+        if self.sorted:
+            a = 0 if lo is None else int(np.searchsorted(day, lo))
+            b = self.size if hi is None else int(np.searchsorted(day, hi))
+            rows = slice(a, b)
+        else:
+            rows = np.ones(self.size, bool)
+            if lo is not None:
+                rows &= day >= lo
+            if hi is not None:
+                rows &= day < hi
+        picked = day[rows]
+        if not len(picked) and (lo is None or hi is None):
+            # nothing selected and an open end: an empty range
+            lo = hi = lo if lo is not None else (hi if hi is not None else 1)
+        if lo is None:
+            lo = int(picked.min())
+        if hi is None:
+            hi = int(picked.max()) + 1
+        return rows, lo, max(lo, hi)
+
+    def _by_day(self, rows, lo, hi, values, categories):
+        # counts[d, c] = rows on day lo + d whose value is c (values < 0 skipped)
+        day = self.day[rows]
+        keep = values >= 0
+        span = hi - lo
+        flat = (day[keep] - lo).astype(np.int64) * categories + values[keep]
+        counts = np.bincount(flat, minlength=span * categories)[:span * categories]
+        dates = [date.fromordinal(lo + i) for i in range(span)]
+        return dates, counts.reshape(span, categories)
+
+    def mood_by_day(self, start=None, end=None):
+        # (dates, counts): counts[i, m] exchanges on dates[i] with mood MOOD_LABELS[m]
+        rows, lo, hi = self._select(start, end)
+        return self._by_day(rows, lo, hi, self.mood[rows], len(MOOD_LABELS))
+
+    def keys_by_day(self, keywords, start=None, end=None):
+        # (dates, counts): counts[i, j] messages on dates[i] answered by keywords[j]
+        column = np.full(len(self.keys) + 1, -1, np.int32)   # key id + 1 -> column
+        for j, keyword in enumerate(keywords):
+            if keyword in self._key_ids:
+                column[self._key_ids[keyword] + 1] = j
+        rows, lo, hi = self._select(start, end)
+        return self._by_day(rows, lo, hi, column[self.key[rows] + 1], len(keywords))
+
+    def fallback_by_day(self, start=None, end=None):
+        # (dates, exchanges per day, fallback rate per day)
+        rows, lo, hi = self._select(start, end)
+        dates, counts = self._by_day(rows, lo, hi, (self.key[rows] == NO_KEY).astype(np.int8), 2)
+        totals = counts.sum(axis=1)
+        rates = np.divide(counts[:, 1], totals, out=np.zeros(len(totals)), where=totals > 0)
+        return dates, totals, rates
+
+    def top_keys(self, start=None, end=None, n=10):
+        # [(keyword, count)] most frequent matched keywords in the range
+        rows, _, _ = self._select(start, end)
+        counts = np.bincount(self.key[rows] + 1, minlength=len(self.keys) + 1)[1:]
+        order = np.argsort(counts, kind="stable")[::-1][:n]
+        return [(self.keys[i], int(counts[i])) for i in order if counts[i]]
+
+    def report(self, start=None, end=None, keywords=()):
+        # one dict per day, for dashboards
+        dates, moods = self.mood_by_day(start, end)
+        _, totals, rates = self.fallback_by_day(start, end)
+        _, key_counts = self.keys_by_day(list(keywords), start, end)
+        days = []
+        for i, day in enumerate(dates):
+            days.append({
+                "date": day.isoformat(),
+                "exchanges": int(totals[i]),
+                "moods": dict(zip(MOOD_LABELS, moods[i].tolist())),
+                "fallback_rate": float(rates[i]),
+                "keys": dict(zip(keywords, key_counts[i].tolist())),
+            })
+        return days
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Daily mood and keyword counts from the chat history")
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--responses", default=RESPONSES_FILE)
+    parser.add_argument("--since", type=date.fromisoformat, help="first day (YYYY-MM-DD)")
+    parser.add_argument("--until", type=date.fromisoformat, help="day after the last one")
+    parser.add_argument("--keys", nargs="*", default=["stress", "sad", "happy"], help="keywords to count per day")
+    parser.add_argument("--top", type=int, default=10, help="also list the N most matched keywords")
+    args = parser.parse_args(argv)
+
+    analytics = MoodAnalytics(args.history, args.responses)
+    try:
+        start = time.perf_counter()
+        added = analytics.update()
+        if added or not analytics.restored:
+            analytics.save()
+        update_s = time.perf_counter() - start
+        start = time.perf_counter()
+        days = analytics.report(args.since, args.until, args.keys)
+        top = analytics.top_keys(args.since, args.until, args.top)
+        query_s = time.perf_counter() - start
+    finally:
+        analytics.close()
+    print(json.dumps({
+        "rows": len(analytics), "ingested": added, "restored": analytics.restored,
+        "update_s": update_s, "query_s": query_s, "top_keys": top, "days": days,
+    }, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import time
+STARTED = time.perf_counter()
+
+import argparse
+import json
+import sys
+from engine import ChatEngine, JourneyState
+
+# ====================================================================
+# --- TERMINAL CHAT (NO GUI) ---
+# ====================================================================
+# Same engine as the wx app, without importing wx at all.  Startup time
+# (module import -> first prompt) can be reported as a JSON metric:
+#   python pesuchatbot/cli.py --report-startup
+#   python pesuchatbot/cli.py --startup-only     # measure and exit
+#   python pesuchatbot/cli.py --metrics-file m.json   # dump metrics on exit
+
+HELP = """Commands:
+  /support   mental health support chat (default)
+  /campus    campus assistant (try "list places" or "from A Block to Cricket Field")
+  /journey   inner journey questions
+  /help      show this help
+  /quit      exit"""
+
+GREETINGS = {
+    "support": "Hello! I'm your PESU Wellness companion 🌼 How are you feeling today?",
+    "campus": "Hi — I'm the PESU Campus assistant. Ask about a place or type 'list places'.",
+    "journey": "Inner Journey Program 🧘\nPress Enter to begin exploring awareness and consciousness.",
+}
+
+def print_bot(text):
+    for i, line in enumerate(text.splitlines() or [""]):
+        prefix = "Bot: " if i == 0 else "     "
+        print(f"{prefix}{line}")
+    print()
+
+def startup_metric(frontend):
+    return {"metric": "startup_to_prompt_s", "frontend": frontend, "value": time.perf_counter() - STARTED}
+
+def run(engine, mode):
+    journey = JourneyState()
+    print_bot(GREETINGS[mode])
+    while True:
+        try:
+            line = input(f"[{mode}] You: ").strip()
+        except (EOFError, KeyboardInterrupt):
+            print()
+            return
+
+        if line.startswith("/"):
+            command = line[1:].lower()
+            if command in ("quit", "exit", "q"):
+                return
+            if command == "help":
+                print(HELP + "\n")
+            elif command in GREETINGS:
+                mode = command
+                journey.reset()
+                print_bot(GREETINGS[mode])
+            else:
+                print(f"Unknown command {line!r}. Type /help for commands.\n")
+            continue
+
+        if mode == "journey":
+            for reply in engine.journey_reply(journey, line):
+                print_bot(reply)
+            continue
+        if not line:
+            continue
+        if mode == "support":
+            print_bot(engine.support_reply(line))
+        else:
+            print_bot(engine.campus_reply(line))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PESU support assistant in the terminal")
+    parser.add_argument("--mode", choices=sorted(GREETINGS), default="support")
+    parser.add_argument("--report-startup", action="store_true", help="print the startup metric as JSON on stderr")
+    parser.add_argument("--startup-only", action="store_true", help="report the startup metric and exit")
+    parser.add_argument("--metrics-file", help="write latency/hit-rate metrics here as JSON on exit")
+    args = parser.parse_args(argv)
+
+    engine = ChatEngine()
+    try:
+        if args.report_startup or args.startup_only:
+            print(json.dumps(startup_metric("cli")), file=sys.stderr)
+        if args.startup_only:
+            return 0
+        print(HELP + "\n")
+        run(engine, args.mode)
+    finally:
+        engine.close()
+        if args.metrics_file:
+            engine.metrics.dump(args.metrics_file)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from matcher import keyword_normalizer
+
+# ====================================================================
+# --- PRECOMPILED RESPONSE CORPUS ---
+# ====================================================================
+# responses.txt plus the built-in tiers, compiled once into a binary
+# artifact (<responses file>.corpus) holding the normalized table and the
+# flattened keyword automaton of ResponseMatcher.  Loading it is an mmap
+# and a header check: nothing is parsed or rebuilt, the sections are read
+# in place as uint32 arrays.  The header records the format version, the
+# source file's mtime/size and a digest of the built-in tiers; if any of
+# them no longer match, open_corpus() returns None and the caller falls
+# back to parsing the text file.
+#   python pesuchatbot/corpus.py            # compile responses.txt
+#   python pesuchatbot/corpus.py --check    # is the artifact fresh?
+#
+# Every keyword of every tier gets a global id in priority order (tier by
+# tier, dict order inside a tier), so the best (tier, rank) of the
+# in-memory matcher is simply the smallest id here.
+
+MAGIC = b"PESUCORP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIqq32sI")   # magic, version, mtime_ns, size, tiers digest, sections
+SECTION = struct.Struct("<QQ")         # offset, length
+SECTIONS = (
+    "edges", "chars", "targets", "fail", "best", "out_link", "own_offsets", "own_ids",
+    "always", "tier_starts", "key_offsets", "keys", "reply_index", "reply_offsets", "replies",
+    "file_order",
+)
+BLOBS = ("keys", "replies")   # utf-8 bytes; every other section is uint32
+NONE = 0xFFFFFFFF
+
+def corpus_path(filename):
+    return filename + ".corpus"
+
+def source_signature(filename):
+    try:
+        st = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def tiers_digest(tiers):
+    return hashlib.sha256(json.dumps(tiers, ensure_ascii=False).encode("utf-8")).digest()
+
+def _utf8_table(strings):
+    offsets = array("I", [0])
+    blob = bytearray()
+    for s in strings:
+        blob += s.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+# ---------------------- COMPILE ----------------------
+def write_corpus(path, matcher, signature):
+    # matcher: a ResponseMatcher whose last tier is the file table.
+    # signature: source_signature() of the text file taken *before* it was
+    # read, so an edit made while compiling leaves the artifact stale
+    # rather than wrong.
+    tier_starts = array("I", [0])
+    keys, replies = [], []
+    reply_index = array("I", [0])
+    for tier in matcher.tiers:
+        for key, values in tier.items():
+            keys.append(key)
+            replies.extend(values)
+            reply_index.append(len(replies))
+        tier_starts.append(len(keys))
+
+    def gid(rank):
+        return tier_starts[rank[0]] + rank[1]
+
+    edges, chars, targets = array("I", [0]), array("I"), array("I")
+    own_offsets, own_ids = array("I", [0]), array("I")
+    for node, transitions in enumerate(matcher._goto):
+        for ch, nxt in sorted(transitions.items()):
+            chars.append(ord(ch))
+            targets.append(nxt)
+        edges.append(len(chars))
+        own_ids.extend(sorted(gid(rank) for rank in matcher._own.get(node, ())))
+        own_offsets.append(len(own_ids))
+
+    key_offsets, key_blob = _utf8_table(keys)
+    reply_offsets, reply_blob = _utf8_table(replies)
+    file_ids = range(tier_starts[-2], tier_starts[-1])
+    sections = {
+        "edges": edges,
+        "chars": chars,
+        "targets": targets,
+        "fail": array("I", matcher._fail),
+        "best": array("I", (NONE if rank is None else gid(rank) for rank in matcher._best)),
+        "out_link": array("I", matcher._out_link),
+        "own_offsets": own_offsets,
+        "own_ids": own_ids,
+        "always": array("I", sorted(gid(rank) for rank in matcher._empty)),
+        "tier_starts": tier_starts,
+        "key_offsets": key_offsets,
+        "keys": key_blob,
+        "reply_index": reply_index,
+        "reply_offsets": reply_offsets,
+        "replies": reply_blob,
+        "file_order": array("I", sorted(file_ids, key=lambda g: key_blob[key_offsets[g]:key_offsets[g + 1]])),
+    }
+
+    table, payload = [], []
+    offset = HEADER.size + SECTION.size * len(SECTIONS)
+    for name in SECTIONS:
+        data = sections[name]
+        if name not in BLOBS:
+            if sys.byteorder == "big":
+                data.byteswap()
+            data = data.tobytes()
+        offset = (offset + 7) & ~7
+        table.append((offset, len(data)))
+        payload.append((offset, data))
+        offset += len(data)
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, signature[0], signature[1],
+                            tiers_digest(matcher.tiers[:-1]), len(SECTIONS)))
+        for entry in table:
+            f.write(SECTION.pack(*entry))
+        for offset, data in payload:
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(data)
+    os.replace(tmp, path)
+    return {"keys": len(keys), "nodes": len(matcher._goto), "bytes": offset}
+
+# ---------------------- LOAD ----------------------
+def open_corpus(path, source, builtin_tiers):
+    # Returns (responses, matcher) from a fresh artifact, or None when it
+    # is missing, stale or unreadable.
+    if sys.byteorder != "little":
+        return None  # sections are cast in place, little-endian only
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None  # ValueError: empty file
+
+    fresh = len(mm) >= HEADER.size + SECTION.size * len(SECTIONS)
+    if fresh:
+        magic, version, mtime_ns, size, digest, count = HEADER.unpack_from(mm, 0)
+        fresh = (magic == MAGIC and version == FORMAT_VERSION and count == len(SECTIONS)
+                 and (mtime_ns, size) == source_signature(source)
+                 and digest == tiers_digest(builtin_tiers))
+    spans = []
+    if fresh:
+        for i in range(len(SECTIONS)):
+            offset, length = SECTION.unpack_from(mm, HEADER.size + i * SECTION.size)
+            spans.append((offset, length))
+            if offset + length > len(mm) or (SECTIONS[i] not in BLOBS and (offset | length) & 3):
+                fresh = False
+    if not fresh:
+        mm.close()
+        return None
+
+    view = memoryview(mm)
+    sections = {}
+    for name, (offset, length) in zip(SECTIONS, spans):
+        part = view[offset:offset + length]
+        sections[name] = part if name in BLOBS else part.cast("I")
+    matcher = CompiledMatcher(sections)
+    return CorpusResponses(matcher), matcher
+
+class CompiledMatcher:
+    # Same answers as ResponseMatcher, read straight from the mapped
+    # sections.  A node's transitions are turned into a dict
+    # {ch: (target, best id of target)} the first time a scan reaches it,
+    # so loading does no per-keyword work and the states real traffic
+    # keeps hitting run at in-memory matcher speed.
+    def __init__(self, sections):
+        for name, data in sections.items():
+            setattr(self, "_" + name, data)
+        # empty keys are "in" every text; the first one is the floor
+        self._first_always = self._always[0] if len(self._always) else NONE
+        self._goto = [None] * (len(self._edges) - 1)
+        self._normalize = None
+
+    def normalize(self, text):
+        # see keyword_normalizer(); built on first use, it reads every edge
+        if self._normalize is None:
+            self._normalize = keyword_normalizer(set(map(chr, self._chars)))
+        return self._normalize(text)
+
+    def _transitions(self, node):
+        lo, hi = self._edges[node], self._edges[node + 1]
+        best = self._best
+        goto = {chr(c): (t, best[t]) for c, t in zip(self._chars[lo:hi], self._targets[lo:hi])}
+        self._goto[node] = goto
+        return goto
+
+    def _key_bytes(self, gid):
+        return bytes(self._keys[self._key_offsets[gid]:self._key_offsets[gid + 1]])
+
+    def _key(self, gid):
+        return str(self._key_bytes(gid), "utf-8")
+
+    def _tier(self, gid):
+        return bisect.bisect_right(self._tier_starts, gid) - 1
+
+    def _reply_list(self, gid):
+        offsets, blob = self._reply_offsets, self._replies
+        return [str(blob[offsets[i]:offsets[i + 1]], "utf-8")
+                for i in range(self._reply_index[gid], self._reply_index[gid + 1])]
+
+    def _scan(self, text):
+        # yields the automaton state after each character
+        cache, fail = self._goto, self._fail
+        node = 0
+        for ch in text:
+            while True:
+                goto = cache[node]
+                if goto is None:
+                    goto = self._transitions(node)
+                hit = goto.get(ch)
+                if hit is not None:
+                    node = hit[0]
+                    break
+                if not node:
+                    break
+                node = fail[node]
+            yield node
+
+    def _winner(self, text):
+        # _scan() inlined: this is the get_response hot path
+        cache, fail = self._goto, self._fail
+        found = self._first_always
+        node = 0
+        for ch in text:
+            while True:
+                goto = cache[node]
+                if goto is None:
+                    goto = self._transitions(node)
+                hit = goto.get(ch)
+                if hit is not None:
+                    node, rank = hit
+                    break
+                if not node:
+                    rank = NONE  # stuck at the root, which never ends a keyword
+                    break
+                node = fail[node]
+            if rank < found:
+                found = rank
+                if not found:
+                    break
+        return found
+
+    def match(self, text):
+        # Returns (tier_index, key) of the winning keyword, or None.
+        found = self._winner(text)
+        if found == NONE:
+            return None
+        return self._tier(found), self._key(found)
+
+    def findall(self, text):
+        # Returns the set of every (tier_index, key) occurring in text.
+        own_offsets, own_ids, out_link = self._own_offsets, self._own_ids, self._out_link
+        gids = set(self._always)
+        for node in self._scan(text):
+            hit = node if own_offsets[node] != own_offsets[node + 1] else out_link[node]
+            while hit:
+                gids.update(own_ids[own_offsets[hit]:own_offsets[hit + 1]])
+                hit = out_link[hit]
+        return {(self._tier(g), self._key(g)) for g in gids}
+
+    def resolve(self, text):
+        # Returns (tier_index, reply list) of the winning keyword, or None.
+        found = self._winner(text)
+        if found == NONE:
+            return None
+        return self._tier(found), self._reply_list(found)
+
+    def candidates(self, text):
+        # Returns the reply list of the winning keyword, or None.
+        hit = self.resolve(text)
+        return None if hit is None else hit[1]
+
+class CorpusResponses(Mapping):
+    # Read-only {keyword: reply} view of the file tier, in file order.
+    def __init__(self, matcher):
+        self._matcher = matcher
+        self._start = matcher._tier_starts[-2]
+        self._stop = matcher._tier_starts[-1]
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __iter__(self):
+        for gid in range(self._start, self._stop):
+            yield self._matcher._key(gid)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            want = key.encode("utf-8")
+            order = self._matcher._file_order
+            i = bisect.bisect_left(order, want, key=self._matcher._key_bytes)
+            if i < len(order) and self._matcher._key_bytes(order[i]) == want:
+                return self._matcher._reply_list(order[i])[0]
+        raise KeyError(key)
+
+def main(argv=None):
+    import argparse
+    import time
+    from engine import RESPONSES_FILE, compile_responses, response_tiers
+
+    parser = argparse.ArgumentParser(description="Compile responses.txt into a memory-mapped corpus")
+    parser.add_argument("responses", nargs="?", default=RESPONSES_FILE)
+    parser.add_argument("-o", "--output", help="artifact path (default: <responses>.corpus)")
+    parser.add_argument("--check", action="store_true", help="only report whether the artifact is fresh")
+    args = parser.parse_args(argv)
+    path = args.output or corpus_path(args.responses)
+
+    if args.check:
+        fresh = open_corpus(path, args.responses, response_tiers({})[:-1]) is not None
+        print(json.dumps({"corpus": path, "fresh": fresh}))
+        return 0 if fresh else 1
+    start = time.perf_counter()
+    info = compile_responses(args.responses, path)
+    info.update(corpus=path, seconds=time.perf_counter() - start)
+    print(json.dumps(info))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
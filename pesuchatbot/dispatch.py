@@ -0,0 +1,88 @@
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# ====================================================================
+# --- BACKGROUND DISPATCH FOR UI HANDLERS ---
+# ====================================================================
+# Handlers hand their work to a shared thread pool instead of running it
+# inside the event handler.  Jobs are grouped into lanes (one per tab);
+# a lane runs its jobs one at a time, in submission order, so replies
+# within a tab never overtake each other while different tabs still run
+# in parallel.  Results are handed back through `post` - wx.CallAfter in
+# the GUI - so callbacks always run on the UI thread.
+
+class LaneDispatcher:
+    def __init__(self, post, max_workers=4):
+        self._post = post
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-worker")
+        self._lanes = {}
+        self._lock = threading.Lock()
+
+    def submit(self, lane, work, callback=None, *args):
+        job = (work, args, callback)
+        with self._lock:
+            queue = self._lanes.setdefault(lane, deque())
+            queue.append(job)
+            idle = len(queue) == 1
+        if idle:
+            self._pool.submit(self._drain, lane)
+
+    def _drain(self, lane):
+        queue = self._lanes[lane]
+        while True:
+            with self._lock:
+                work, args, callback = queue[0]
+            try:
+                result = work(*args)
+            except Exception:
+                traceback.print_exc()
+            else:
+                if callback is not None:
+                    self._post(callback, result)
+            with self._lock:
+                queue.popleft()
+                if not queue:
+                    return
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+# ====================================================================
+# --- EVENT LOOP LAG MONITOR ---
+# ====================================================================
+# Driven by a periodic timer on the UI thread: any delay between when a
+# tick was due and when it actually ran is time the event loop spent
+# blocked.
+
+class LoopLagMonitor:
+    def __init__(self, interval_ms=50, blocked_ms=100):
+        self.interval = interval_ms / 1000.0
+        self.blocked_threshold = blocked_ms / 1000.0
+        self.ticks = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.blocked_count = 0
+        self._last = None
+
+    def tick(self):
+        now = time.perf_counter()
+        if self._last is not None:
+            lag = max(0.0, now - self._last - self.interval)
+            self.ticks += 1
+            self.total_lag += lag
+            if lag > self.max_lag:
+                self.max_lag = lag
+            if lag >= self.blocked_threshold:
+                self.blocked_count += 1
+        self._last = now
+
+    def stats(self):
+        return {
+            "ticks": self.ticks,
+            "mean_lag_ms": 1000 * self.total_lag / self.ticks if self.ticks else 0.0,
+            "max_lag_ms": 1000 * self.max_lag,
+            "blocked_count": self.blocked_count,
+        }
@@ -0,0 +1,363 @@
+import os
+import re
+from datetime import datetime
+import random
+import time
+from corpus import corpus_path, open_corpus, source_signature, write_corpus
+from history import HistoryWriter, format_record
+from matcher import ResponseMatcher
+from metrics import Metrics
+from places import PlaceIndex
+from response_cache import ResponseCache
+from response_store import ResponseStore
+from routing import CampusGraph, Router
+
+# ==================================================================== 
+# --- FILES & DEFAULT RESPONSES ---
+# ==================================================================== 
+RESPONSES_FILE = "responses.txt"
+HISTORY_FILE = "chat_history.txt"
+CAMPUS_MAP_FILE = "campus_map.json"
+
+DEFAULT_RESPONSES = {
+    "stress": "It's okay to feel stressed sometimes. Take a moment to breathe deeply and ground yourself. 🌱",
+    "exam": "Exams can be challenging, but you're capable of handling it. Take it one step at a time. ✨",
+    "anxiety": "Anxiety can be tough, but you're not alone. Focus on small calming steps. 💚",
+    "sad": "It's okay to feel sad sometimes. Be kind to yourself — you deserve care and rest. 💙",
+    "hello": "Hey there! I'm glad you reached out. How are you feeling today? 🌼",
+    "lonely": "Feeling lonely can be heavy. Remember you matter. 💫",
+    "tired": "You must be feeling exhausted. Rest is important — it's okay to slow down. ☁",
+    "bye": "Take care of yourself. You're doing your best, and that's enough. 🌷"
+}
+
+CAMPUS_PLACES = {
+    "Golden Jubilee Block (GJBC)": {"short": "Main academic block near the food court.", "directions": "Head southeast from the main courtyard.", "aliases": ["golden jubilee", "gjb block"]},
+    "Hornbill Coffee": {"short": "Coffee shop on the east side of the GJBC.", "directions": "Walk east from GJBC across the open area.", "aliases": ["cafe", "coffee shop"]},
+    "Central Library": {"short": "Central library located northwest of GJBC.", "directions": "Walk northwest from GJBC across the open area.", "aliases": ["library"]},
+    "GJB Food Court": {"short": "Food court next to Golden Jubilee Block.", "directions": "Walk east-southeast from the GJBC main entrance.", "aliases": ["canteen", "cafeteria"]},
+    "A Block": {"short": "Central academic building with lecture halls.", "directions": "Find via main paths from the courtyard.", "aliases": ["lecture halls"]},
+    "Boys Hostel": {"short": "Student accommodation (boys).", "directions": "Located on the eastern side of campus.", "aliases": ["hostel"]},
+    "Cricket Field": {"short": "Sports field on the north side.", "directions": "Go north from central campus.", "aliases": ["cricket ground", "sports field"]}
+}
+
+POSITIVE_RESPONSES = {
+    "good": ["I'm really glad to hear you're feeling good! 😊", "That's nice to hear — keep enjoying your day! 🌱"],
+    "great": ["That's wonderful! 💚", "Love that energy! 🌟"],
+    "happy": ["That's beautiful! 😊", "Love to hear that you're feeling happy! 🌈"],
+}
+
+NEGATIVE_RESPONSES = {
+    "stress": ["It's okay to feel stressed. Take a deep breath and give yourself a moment to relax. 🌱"],
+    "tired": ["You must be feeling exhausted. Rest is important — it's okay to slow down. ☁"],
+    "anxiety": ["Anxiety can be overwhelming, but you're not alone. Focus on small calming steps and breathe deeply. 💚"],
+    "sad": ["I'm sorry you're feeling sad. It's okay to take time for yourself. 💙"],
+}
+
+NEUTRAL_RESPONSES = {
+    "hello": "Hey there! I'm glad you reached out. 🌼",
+    "hi": "Hi! It's nice to hear from you. 💚",
+    "thanks": "You're welcome 🤍",
+    "bye": "Take care of yourself. You matter 🌷"
+}
+
+REFLECTIVE_FALLBACKS = [
+    "I hear you. Would you like to tell me a little more? 💛",
+    "That sounds important… I'm here to listen. 🌿",
+    "You're not alone. Take your time, I'm here. 💚"
+]
+
+ANALYSIS_QUESTIONS = [
+    "What shall I call you?",
+    "Who do you believe you are:\nA) The body\nB) The mind\nC) The emotions\nD) The awareness\n\nChoose A, B, C, or D: ",
+    "Now tell me in one word what you feel your true nature is. Examples: peace, void, happiness, energy, silence: ",
+    "How does this void feel to you:\nA) Peaceful nothingness\nB) Powerful silence\nC) Spacious awareness\nD) Presence without identity\nE) All of the above\n\nChoose A, B, C, D, or E: "
+]
+
+def ensure_responses_file(filename=RESPONSES_FILE):
+    if not os.path.isfile(filename):
+        with open(filename, "w", encoding="utf-8") as f:
+            for k, v in DEFAULT_RESPONSES.items():
+                f.write(f"{k}:{v}\n")
+
+def load_responses(filename=RESPONSES_FILE):
+    responses = {}
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            for line in f:
+                if ":" in line:
+                    key, value = line.strip().split(":", 1)
+                    key, value = key.lower().strip(), value.strip()
+                    if key:
+                        responses[key] = value
+    except FileNotFoundError:
+        pass
+    return responses
+
+def save_chat(user, bot, filename=HISTORY_FILE):
+    with open(filename, "a", encoding="utf-8") as f:
+        f.write(format_record(user, bot))
+
+def timestamp():
+    return datetime.now().strftime("%H:%M")
+
+TIER_NAMES = ("positive", "negative", "neutral", "file")
+
+def response_tiers(file_responses):
+    # keyword tiers in priority order; responses.txt always comes last
+    return [
+        POSITIVE_RESPONSES,
+        NEGATIVE_RESPONSES,
+        {k: [v] for k, v in NEUTRAL_RESPONSES.items()},
+        {k: [v] for k, v in file_responses.items()},
+    ]
+
+def build_matcher(file_responses):
+    return ResponseMatcher(response_tiers(file_responses))
+
+def build_response_table(filename=RESPONSES_FILE):
+    responses = load_responses(filename)
+    return responses, build_matcher(responses)
+
+def compile_responses(filename=RESPONSES_FILE, corpus_file=None):
+    # Writes the precompiled corpus for `filename` (see corpus.py).
+    signature = source_signature(filename)
+    if signature is None:
+        raise FileNotFoundError(filename)
+    _, matcher = build_response_table(filename)
+    return write_corpus(corpus_file or corpus_path(filename), matcher, signature)
+
+def load_response_table(filename=RESPONSES_FILE):
+    # The compiled corpus when it is fresh, else parse the text file.
+    table = open_corpus(corpus_path(filename), filename, response_tiers({})[:-1])
+    if table is None:
+        return build_response_table(filename)
+    return table
+
+def pick_reply(hit):
+    # (source, reply) for a matcher.resolve() result: source is the
+    # winning tier's name, or "fallback"
+    if hit is None:
+        return "fallback", random.choice(REFLECTIVE_FALLBACKS)
+    tier, replies = hit
+    return TIER_NAMES[tier], random.choice(replies)
+
+def respond(user_input, matcher):
+    return pick_reply(matcher.resolve(user_input.lower()))
+
+_last_matcher = (None, None)   # (copy of file_responses, its matcher)
+
+def cached_matcher(file_responses):
+    # The matcher for file_responses, rebuilt only when the table changed
+    # since the last call; comparing the tables is far cheaper than
+    # building the automaton.
+    global _last_matcher
+    table, matcher = _last_matcher
+    if matcher is None or table != file_responses:
+        matcher = build_matcher(file_responses)
+        _last_matcher = (dict(file_responses), matcher)
+    return matcher
+
+def get_response(user_input, file_responses, matcher=None):
+    if matcher is None:
+        matcher = cached_matcher(file_responses)
+    return respond(user_input, matcher)[1]
+
+def place_info_text(key):
+    info = CAMPUS_PLACES.get(key, {})
+    return f"{key}\n\n{info.get('short','No short info')}\n\nDirections: {info.get('directions','No directions available')}"
+
+ROUTE_PATTERNS = [
+    re.compile(r"\bfrom\s+(?P<src>.+?)\s+to\s+(?P<dst>.+)"),
+    re.compile(r"\bto\s+(?P<dst>.+?)\s+from\s+(?P<src>.+)"),
+]
+
+def load_router(filename=CAMPUS_MAP_FILE, precompute=True):
+    try:
+        return Router(CampusGraph.load(filename), precompute)
+    except FileNotFoundError:
+        return None
+
+def campus_route_response(q_l, index, router):
+    # (result, text) for "from A to B" questions, or None
+    for pattern in ROUTE_PATTERNS:
+        m = pattern.search(q_l)
+        if m is None:
+            continue
+        src, dst = index.best(m.group("src")), index.best(m.group("dst"))
+        if src is None or dst is None:
+            return None
+        route = router.route(src, dst)
+        if route is None:
+            return "no_route", f"Sorry — I don't know a walking route from {src} to {dst} yet."
+        return "route", route.describe()
+    return None
+
+def campus_answer(q, index=None, router=None):
+    # (result, text); result is route, no_route, place, list or miss
+    if index is None:
+        index = PlaceIndex(CAMPUS_PLACES)
+    q_l = q.lower()
+    if router is not None:
+        answer = campus_route_response(q_l, index, router)
+        if answer is not None:
+            return answer
+    key = index.best(q)
+    if key is not None:
+        info = index.places[key]
+        return "place", f"{key}\n\n{info.get('short','')}\n\nDirections: {info.get('directions','')}"
+    if "list" in q_l or "places" in q_l:
+        return "list", "Places:\n" + "\n".join(f"- {k}" for k in index.names)
+    return "miss", "Sorry — I don't have an exact answer. Try clicking a place button or asking for a list."
+
+def generate_campus_response(q, index=None, router=None):
+    return campus_answer(q, index, router)[1]
+
+# ==================================================================== 
+# --- INNER JOURNEY STATE MACHINE ---
+# ==================================================================== 
+ANALYSIS_FIELDS = ["name", "who", "nature", "void"]
+
+JOURNEY_WELCOME = "Welcome to the Inner Journey. Let's begin..."
+
+class JourneyState:
+    # slotted: the server may hold one of these per connected user
+    __slots__ = ("started", "stage", "answers")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = False
+        self.stage = 0
+        self.answers = ()
+
+    @property
+    def data(self):
+        return dict(zip(ANALYSIS_FIELDS, self.answers))
+
+def journey_question(state):
+    if state.stage < len(ANALYSIS_QUESTIONS):
+        return f"[{state.stage+1}] {ANALYSIS_QUESTIONS[state.stage]}"
+    return None
+
+def journey_summary(data):
+    name = data.get('name', 'Traveller')
+    who = data.get('who', 'not given')
+    nature = data.get('nature', 'undefined')
+
+    summary = f"""Analysis Complete for {name}
+
+Your Exploration:
+- Primary belief of self: {who.upper()}
+- True nature: {nature.upper()}
+
+"""
+    if who.lower() == 'd' or 'awareness' in who.lower():
+        summary += "This aligns with pure awareness. 🌙\n"
+
+    summary += "\nThank you for this inner journey, traveller of consciousness."
+    return summary
+
+def journey_step(state, user_input):
+    # Returns the bot messages for one press of Start/Submit.
+    if not state.started:
+        state.reset()
+        state.started = True
+        return [JOURNEY_WELCOME, journey_question(state)]
+
+    if not user_input:
+        return []
+
+    if state.stage < len(ANALYSIS_FIELDS):
+        state.answers += (user_input,)
+    state.stage += 1
+
+    if state.stage < len(ANALYSIS_QUESTIONS):
+        return [journey_question(state)]
+    summary = journey_summary(state.data)
+    state.reset()
+    return [summary]
+
+# ==================================================================== 
+# --- CHAT ENGINE ---
+# ==================================================================== 
+class ChatEngine:
+    def __init__(self, responses_file=RESPONSES_FILE, history_file=HISTORY_FILE, history_writer=None,
+                 campus_map_file=CAMPUS_MAP_FILE, metrics=None, response_cache_size=10_000):
+        ensure_responses_file(responses_file)
+        self.store = ResponseStore(responses_file, load_response_table)
+        self.cache = ResponseCache(response_cache_size)
+        self.store.add_listener(self.cache.invalidate)
+        self.history = history_writer or HistoryWriter(history_file)
+        self.places = PlaceIndex(CAMPUS_PLACES)
+        self.router = load_router(campus_map_file)
+        self.metrics = metrics or Metrics()
+        self._register_metrics()
+
+    def _register_metrics(self):
+        m = self.metrics
+        m.describe("stage_seconds", "Latency of each engine stage.")
+        m.describe("responses_total", "Support replies by source: the matched tier or fallback.")
+        m.describe("campus_total", "Campus answers by result; miss means no place was recognised.")
+        m.describe("history_bytes_written_total", "Bytes appended to the chat history file.")
+        m.describe("history_batch_seconds_total", "Time the background writer spent writing batches to disk.")
+        m.describe("response_reloads_total", "Hot reloads of the response table.")
+        m.describe("response_reload_errors_total", "Background reloads of responses.txt that failed; the old table stays in use.")
+        m.describe("response_cache_hits_total", "Support messages answered from the normalized-input cache.")
+        m.add_collector(self._collect)
+
+    def _collect(self):
+        history, store = self.history, self.store.stats()
+        yield "history_records_written_total", "counter", (), history.records_written
+        yield "history_bytes_written_total", "counter", (), history.bytes_written
+        yield "history_batches_written_total", "counter", (), history.batches_written
+        yield "history_batch_seconds_total", "counter", (), history.batch_seconds
+        yield "history_last_batch_seconds", "gauge", (), history.last_batch_seconds
+        yield "history_rotations_total", "counter", (), history.rotations
+        yield "history_write_errors_total", "counter", (), history.write_errors
+        yield "history_records_dropped_total", "counter", (), history.records_dropped
+        yield "response_table_version", "gauge", (), store["version"]
+        yield "response_reloads_total", "counter", (), store["reload_count"]
+        yield "response_reload_seconds_total", "counter", (), store["total_reload_seconds"]
+        yield "response_reload_errors_total", "counter", (), store["reload_errors"]
+        cache = self.cache
+        yield "response_cache_hits_total", "counter", (), cache.hits
+        yield "response_cache_misses_total", "counter", (), cache.misses
+        yield "response_cache_evictions_total", "counter", (), cache.evictions
+        yield "response_cache_entries", "gauge", (), len(cache)
+
+    @property
+    def responses(self):
+        return self.store.current().responses
+
+    def support_reply(self, user_msg):
+        metrics = self.metrics
+        start = time.perf_counter()
+        table = self.store.current()
+        source, bot_reply = pick_reply(self.cache.resolve(table, user_msg))
+        matched = time.perf_counter()
+        self.history.write(user_msg, bot_reply)
+        metrics.observe("stage_seconds", matched - start, (("stage", "get_response"),))
+        metrics.observe("stage_seconds", time.perf_counter() - matched, (("stage", "history_enqueue"),))
+        metrics.inc("responses_total", (("source", source),))
+        return bot_reply
+
+    def campus_reply(self, q):
+        start = time.perf_counter()
+        result, text = campus_answer(q, self.places, self.router)
+        self.metrics.observe("stage_seconds", time.perf_counter() - start, (("stage", "campus"),))
+        self.metrics.inc("campus_total", (("result", result),))
+        return text
+
+    def place_reply(self, key):
+        self.metrics.inc("campus_total", (("result", "button"),))
+        return place_info_text(key)
+
+    def journey_reply(self, state, user_input):
+        start = time.perf_counter()
+        replies = journey_step(state, user_input)
+        self.metrics.observe("stage_seconds", time.perf_counter() - start, (("stage", "journey"),))
+        return replies
+
+    def close(self):
+        self.history.close()
@@ -0,0 +1,283 @@
+import atexit
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: rely on O_APPEND alone
+    fcntl = None
+
+# ====================================================================
+# --- BUFFERED CHAT HISTORY WRITER ---
+# ====================================================================
+# Callers enqueue records and return immediately; a background thread
+# batches them into a single append per flush.  Flush policies:
+#   "message"  - write (and fsync) as soon as a record is queued
+#   "interval" - write whatever is pending every `interval_ms`
+#   "shutdown" - keep records in memory until flush()/close(), or until
+#                `buffer_bytes` is exceeded so memory stays bounded
+# Files rotate by size (`max_bytes`, numbered backups) and/or by day
+# (`rotate_daily`, dated backups); either way at most `backup_count`
+# backups are kept.
+# A failed append keeps the records and is retried with exponential
+# backoff (up to RETRY_MAX seconds); while writes keep failing, the
+# oldest pending records are dropped beyond `buffer_bytes`.
+
+FLUSH_POLICIES = ("message", "interval", "shutdown")
+
+RETRY_MAX = 30.0
+ERROR_LOG_INTERVAL = 60.0
+
+# a record is two lines; any line break inside a message would let the
+# sender start a record of their own (with any timestamp they like)
+LINE_BREAKS = re.compile(r"[\r\n]+")
+
+_STOP = object()
+log = logging.getLogger(__name__)
+
+class _Flush(threading.Event):
+    # a flush() waiter; ok is False when the append it waited for failed
+    ok = True
+
+def format_record(user, bot, now=None):
+    now = (now or datetime.now()).isoformat()
+    user, bot = LINE_BREAKS.sub(" ", user), LINE_BREAKS.sub(" ", bot)
+    return f"{now} User: {user}\n{now} Bot: {bot}\n\n"
+
+class HistoryWriter:
+    def __init__(self, filename, flush="interval", interval_ms=200, max_bytes=0,
+                 rotate_daily=False, backup_count=5, buffer_bytes=1 << 20):
+        if flush not in FLUSH_POLICIES:
+            raise ValueError(f"flush must be one of {FLUSH_POLICIES}, got {flush!r}")
+        self.filename = filename
+        self.flush_policy = flush
+        self.interval = interval_ms / 1000.0
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.backup_count = backup_count
+        self.buffer_bytes = buffer_bytes
+        self.records_written = 0
+        self.bytes_written = 0
+        self.batches_written = 0
+        self.batch_seconds = 0.0        # time spent in _write_batch (lock, rotate, write, fsync)
+        self.last_batch_seconds = 0.0
+        self.rotations = 0
+        self.write_errors = 0
+        self.records_dropped = 0
+
+        self._queue = queue.Queue()
+        self._fd = None
+        self._day = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---------------------- PUBLIC API ----------------------
+    def write(self, user, bot):
+        if self._closed:
+            raise ValueError("history writer is closed")
+        self._queue.put(format_record(user, bot))
+
+    def flush(self, timeout=None):
+        # Blocks until everything queued before this call is on disk.
+        # Returns False on timeout, or when the append failed (the records
+        # stay queued and are retried).
+        if self._closed:
+            return True
+        done = _Flush()
+        self._queue.put(done)
+        return done.wait(timeout) and done.ok
+
+    def close(self, timeout=None):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    # ---------------------- WRITER THREAD ----------------------
+    def _run(self):
+        pending = []
+        pending_bytes = 0
+        deadline = None
+        retry_at = None     # set while the last append failed
+        failures = 0
+        logged_at = None
+        while True:
+            if pending and retry_at is not None:
+                timeout = max(0.0, retry_at - time.monotonic())
+            elif self.flush_policy == "interval" and pending:
+                timeout = max(0.0, deadline - time.monotonic())
+            else:
+                timeout = None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            waiters = []
+            stop = False
+            while item is not None:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, _Flush):
+                    waiters.append(item)
+                else:
+                    if not pending and self.flush_policy == "interval":
+                        deadline = time.monotonic() + self.interval
+                    pending.append(item)
+                    pending_bytes += len(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            now = time.monotonic()
+            if retry_at is not None:
+                due = stop or waiters or now >= retry_at
+            else:
+                due = (
+                    stop or waiters
+                    or self.flush_policy == "message"
+                    or (self.flush_policy == "interval" and deadline is not None and now >= deadline)
+                    or pending_bytes >= self.buffer_bytes
+                )
+            if pending and due:
+                try:
+                    self._write_batch("".join(pending), len(pending))
+                except OSError as e:
+                    # keep the records and retry later, backing off
+                    for done in waiters:
+                        done.ok = False
+                    self.write_errors += 1
+                    failures += 1
+                    retry_at = now + min(RETRY_MAX, max(self.interval, 0.05) * 2 ** (failures - 1))
+                    deadline = retry_at
+                    while pending and pending_bytes > self.buffer_bytes:
+                        pending_bytes -= len(pending.pop(0))
+                        self.records_dropped += 1
+                    if logged_at is None or now - logged_at >= ERROR_LOG_INTERVAL:
+                        logged_at = now
+                        log.error("history writer: %s (%d failed appends, %d records dropped, %d pending)",
+                                  e, self.write_errors, self.records_dropped, len(pending))
+                else:
+                    pending = []
+                    pending_bytes = 0
+                    deadline = None
+                    retry_at = None
+                    failures = 0
+            for done in waiters:
+                done.set()
+            if stop:
+                if pending:
+                    log.error("history writer: %d records lost at shutdown", len(pending))
+                    self.records_dropped += len(pending)
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                return
+
+    def _write_batch(self, text, count):
+        start = time.perf_counter()
+        data = text.encode("utf-8")
+        if self._fd is None:
+            self._open()
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            self._maybe_rotate(len(data))
+            # O_APPEND + one write per batch keeps records from different
+            # processes from interleaving mid-record
+            os.write(self._fd, data)
+            if self.flush_policy == "message":
+                os.fsync(self._fd)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        elapsed = time.perf_counter() - start
+        self.records_written += count
+        self.bytes_written += len(data)
+        self.batches_written += 1
+        self.batch_seconds += elapsed
+        self.last_batch_seconds = elapsed
+
+    # ---------------------- ROTATION ----------------------
+    def _open(self):
+        self._fd = os.open(self.filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        st = os.fstat(self._fd)
+        self._day = datetime.fromtimestamp(st.st_mtime).date() if st.st_size else datetime.now().date()
+
+    def _maybe_rotate(self, incoming):
+        # another process may already have rotated the file under us
+        try:
+            if os.stat(self.filename).st_ino != os.fstat(self._fd).st_ino:
+                self._reopen()
+        except FileNotFoundError:
+            self._reopen()
+
+        size = os.fstat(self._fd).st_size
+        today = datetime.now().date()
+        if self.rotate_daily and size and today != self._day:
+            self._rotate_dated()
+        elif self.max_bytes and size and size + incoming > self.max_bytes:
+            self._rotate_numbered()
+        self._day = today
+
+    def _rotate_numbered(self):
+        if self.backup_count <= 0:
+            os.truncate(self.filename, 0)
+            self.rotations += 1
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.filename}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.filename}.{i + 1}")
+        os.replace(self.filename, f"{self.filename}.1")
+        self.rotations += 1
+        self._reopen()
+
+    def _rotate_dated(self):
+        target = f"{self.filename}.{self._day.isoformat()}"
+        if os.path.exists(target):
+            # same day rotated twice (size limit hit, or several processes)
+            n = 1
+            while os.path.exists(f"{target}.{n}"):
+                n += 1
+            target = f"{target}.{n}"
+        os.replace(self.filename, target)
+        self.rotations += 1
+        self._reopen()
+        self._prune_dated()
+
+    def _prune_dated(self):
+        # keep the newest `backup_count` dated backups
+        folder, base = os.path.split(os.path.abspath(self.filename))
+        pattern = re.compile(re.escape(base) + r"\.(\d{4}-\d{2}-\d{2})(?:\.(\d+))?$")
+        backups = []
+        for name in os.listdir(folder):
+            m = pattern.match(name)
+            if m:
+                backups.append((m.group(1), int(m.group(2) or 0), name))
+        backups.sort(reverse=True)
+        for _, _, name in backups[max(self.backup_count, 0):]:
+            try:
+                os.remove(os.path.join(folder, name))
+            except FileNotFoundError:
+                pass  # another process pruned it first
+
+    def _reopen(self):
+        old = self._fd
+        self._fd = os.open(self.filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        if old is not None:
+            if fcntl is not None:
+                fcntl.flock(old, fcntl.LOCK_UN)
+            os.close(old)
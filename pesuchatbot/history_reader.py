@@ -0,0 +1,299 @@
+import mmap
+import os
+import re
+import struct
+import zlib
+from collections import namedtuple
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ====================================================================
+# --- INDEXED CHAT HISTORY READER ---
+# ====================================================================
+# chat_history.txt is a sequence of records separated by a blank line:
+#     <iso timestamp> User: <text>
+#     <iso timestamp> Bot: <text>
+# The reader memory-maps the log and keeps a sidecar "<log>.idx" of fixed
+# 16-byte entries (timestamp, byte offset), one per record.  The sidecar
+# is memory-mapped too, so neither file is ever read into memory whole.
+# refresh() only parses bytes appended since the last run; a truncated
+# or rotated log (size shrank or the head bytes changed) is re-indexed.
+
+Exchange = namedtuple("Exchange", "timestamp user bot offset")
+
+INDEX_MAGIC = b"PESUHIDX"
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct("<8sIIQIIQ")
+INDEX_HEADER_SIZE = 64
+INDEX_ENTRY = struct.Struct("<dQ")
+HEAD_BYTES = 4096
+FLAG_UNSORTED = 1
+
+RECORD_RE = re.compile(r"(\S+)\s+User: (.*?)\n\S+\s+Bot: (.*)", re.S)
+
+# the non-ASCII characters whose casefold() contains ASCII ("\u00df" -> "ss",
+# Kelvin sign -> "k", "\ufb01" -> "fi", ...); any other non-ASCII text
+# folds to non-ASCII only, so it can never be part of an ASCII match
+ASCII_FOLDS = "\u00df\u0130\u0149\u017f\u01f0\u1e96\u1e97\u1e98\u1e99\u1e9a\u1e9e\u212a\ufb00\ufb01\ufb02\ufb03\ufb04\ufb05\ufb06"
+ASCII_FOLDS_RE = b"|".join(re.escape(ch.encode("utf-8")) for ch in ASCII_FOLDS)
+
+def _to_epoch(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return value.timestamp()
+
+class HistoryReader:
+    def __init__(self, filename, index_file=None):
+        self.filename = filename
+        self.index_file = index_file or filename + ".idx"
+        self._data = None
+        self._index = None
+        self.count = 0
+        self.indexed_end = 0
+        self.sorted = True
+        self.refresh()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        for mm in (self._data, self._index):
+            if mm is not None:
+                mm.close()
+        self._data = self._index = None
+
+    # ---------------------- INDEX MAINTENANCE ----------------------
+    def refresh(self):
+        # Index records appended since the last call; returns how many.
+        try:
+            size = os.path.getsize(self.filename)
+        except FileNotFoundError:
+            size = 0
+
+        if not os.path.exists(self.index_file):
+            open(self.index_file, "wb").close()
+        with open(self.index_file, "r+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            header = self._read_header(f, size)
+            if header is None:
+                f.truncate(0)
+                header = (0, 0, 0, 0)
+            flags, indexed_end, count, last_ts = header
+            self.close()
+
+            added = 0
+            if size > indexed_end:
+                entries, indexed_end, last_ts, unsorted = self._scan(indexed_end, size, last_ts)
+                if unsorted:
+                    flags |= FLAG_UNSORTED
+                if entries:
+                    f.seek(INDEX_HEADER_SIZE + count * INDEX_ENTRY.size)
+                    f.write(b"".join(INDEX_ENTRY.pack(ts, off) for ts, off in entries))
+                    count += len(entries)
+                    added = len(entries)
+            self._write_header(f, flags, indexed_end, count)
+            f.flush()
+            # lock is released when the file closes
+
+        self.count = count
+        self.indexed_end = indexed_end
+        self.sorted = not flags & FLAG_UNSORTED
+        self._map()
+        return added
+
+    def _read_header(self, f, size):
+        f.seek(0)
+        raw = f.read(INDEX_HEADER_SIZE)
+        if len(raw) < INDEX_HEADER.size:
+            return None
+        magic, version, flags, indexed_end, head_len, head_crc, count = INDEX_HEADER.unpack_from(raw)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION or indexed_end > size:
+            return None
+        if os.fstat(f.fileno()).st_size < INDEX_HEADER_SIZE + count * INDEX_ENTRY.size:
+            return None
+        if head_len and self._head_crc(head_len) != head_crc:
+            return None
+        last_ts = 0
+        if count:
+            f.seek(INDEX_HEADER_SIZE + (count - 1) * INDEX_ENTRY.size)
+            last_ts = INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))[0]
+        return flags, indexed_end, count, last_ts
+
+    def _write_header(self, f, flags, indexed_end, count):
+        head_len = min(HEAD_BYTES, indexed_end)
+        head_crc = self._head_crc(head_len) if head_len else 0
+        raw = INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, flags, indexed_end, head_len, head_crc, count)
+        f.seek(0)
+        f.write(raw.ljust(INDEX_HEADER_SIZE, b"\0"))
+
+    def _head_crc(self, length):
+        with open(self.filename, "rb") as f:
+            return zlib.crc32(f.read(length))
+
+    def _scan(self, start, size, last_ts):
+        entries = []
+        unsorted = False
+        with open(self.filename, "rb") as f:
+            mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        try:
+            pos = start
+            while pos < size:
+                while pos < size and mm[pos:pos + 1] == b"\n":
+                    pos += 1
+                end = mm.find(b"\n\n", pos, size)
+                if end < 0:
+                    break  # record still being written
+                space = mm.find(b" ", pos, end)
+                if space < 0:
+                    space = end
+                try:
+                    ts = datetime.fromisoformat(mm[pos:space].decode("ascii")).timestamp()
+                except (ValueError, UnicodeDecodeError):
+                    ts = None
+                if ts is not None:
+                    if ts < last_ts:
+                        unsorted = True
+                    last_ts = ts
+                    entries.append((ts, pos))
+                pos = end + 2
+        finally:
+            mm.close()
+        return entries, min(pos, size), last_ts, unsorted
+
+    def _map(self):
+        if self.indexed_end:
+            with open(self.filename, "rb") as f:
+                self._data = mmap.mmap(f.fileno(), self.indexed_end, access=mmap.ACCESS_READ)
+        if self.count:
+            with open(self.index_file, "rb") as f:
+                self._index = mmap.mmap(f.fileno(), INDEX_HEADER_SIZE + self.count * INDEX_ENTRY.size, access=mmap.ACCESS_READ)
+
+    # ---------------------- LOOKUPS ----------------------
+    def _entry(self, i):
+        return INDEX_ENTRY.unpack_from(self._index, INDEX_HEADER_SIZE + i * INDEX_ENTRY.size)
+
+    def _bisect_time(self, ts):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _bisect_offset(self, offset):
+        # index of the record containing byte `offset`
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[1] <= offset:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo - 1
+
+    def _record(self, i):
+        ts, start = self._entry(i)
+        end = self._entry(i + 1)[1] if i + 1 < self.count else self.indexed_end
+        stop = self._data.find(b"\n\n", start, end)
+        if stop >= 0:
+            end = stop
+        text = self._data[start:end].decode("utf-8", "replace").rstrip("\n")
+        m = RECORD_RE.match(text)
+        if m is None:
+            return Exchange(datetime.fromtimestamp(ts), text, "", start)
+        return Exchange(datetime.fromtimestamp(ts), m.group(2), m.group(3), start)
+
+    def _candidates(self, start, end):
+        start, end = _to_epoch(start), _to_epoch(end)
+        if not self.sorted:
+            for i in range(self.count):
+                ts = self._entry(i)[0]
+                if (start is None or ts >= start) and (end is None or ts < end):
+                    yield i
+            return
+        lo = 0 if start is None else self._bisect_time(start)
+        hi = self.count if end is None else self._bisect_time(end)
+        yield from range(lo, hi)
+
+    def exchanges(self, start=None, end=None):
+        # Streams exchanges with start <= timestamp < end.
+        for i in self._candidates(start, end):
+            yield self._record(i)
+
+    def records(self, first=0, last=None):
+        # Streams exchanges by record number [first, last), in file order.
+        last = self.count if last is None else min(last, self.count)
+        for i in range(first, last):
+            yield self._record(i)
+
+    def search(self, needle, start=None, end=None, ignore_case=True):
+        # Streams exchanges whose user or bot text contains `needle`.
+        # ignore_case compares casefolded text ("ss" finds "STRASSE" and
+        # "stra\u00dfe", "caf\u00e9" finds "CAF\u00c9").  When the folded needle is
+        # ASCII, a bytes regex over the mapped log finds the candidates:
+        # the needle with ASCII IGNORECASE, or one of the few characters
+        # in ASCII_FOLDS; every candidate is checked with casefold().
+        # Other needles fall back to decoding every record in the range.
+        if not self.count or not needle:
+            return
+        start, end = _to_epoch(start), _to_epoch(end)
+        if self.sorted:
+            lo = 0 if start is None else self._bisect_time(start)
+            hi = self.count if end is None else self._bisect_time(end)
+            if lo >= hi:
+                return
+        else:
+            lo, hi = 0, self.count
+        folded = needle.casefold()
+
+        def hit(exchange):
+            # the timestamp prefix is not part of the conversation text
+            hay = exchange.user + "\n" + exchange.bot
+            return folded in hay.casefold() if ignore_case else needle in hay
+
+        def in_range(ts):
+            return not ((start is not None and ts < start) or (end is not None and ts >= end))
+
+        if ignore_case and not folded.isascii():
+            for i in range(lo, hi):
+                if in_range(self._entry(i)[0]):
+                    exchange = self._record(i)
+                    if hit(exchange):
+                        yield exchange
+            return
+
+        if ignore_case:
+            pattern = re.compile(re.escape(folded.encode("utf-8")) + b"|" + ASCII_FOLDS_RE, re.IGNORECASE)
+        else:
+            pattern = re.compile(re.escape(needle.encode("utf-8")))
+        pos = self._entry(lo)[1]
+        limit = self._entry(hi)[1] if hi < self.count else self.indexed_end
+        last = -1
+        while True:
+            m = pattern.search(self._data, pos, limit)
+            if m is None:
+                return
+            i = self._bisect_offset(m.start())
+            next_start = self._entry(i + 1)[1] if i + 1 < self.count else self.indexed_end
+            pos = max(m.end(), next_start)
+            if i < 0 or i == last:
+                continue
+            last = i
+            if not in_range(self._entry(i)[0]):
+                continue
+            exchange = self._record(i)
+            if hit(exchange):
+                yield exchange
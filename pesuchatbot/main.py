@@ -1,129 +1,48 @@
+import time
+STARTED = time.perf_counter()
+
+import json
 import os
+import sys
 import wx
 import wx.lib.scrolledpanel as scrolled
-from datetime import datetime
-import random
-
-# ==================================================================== 
-# --- FILES & DEFAULT RESPONSES ---
-# ==================================================================== 
-RESPONSES_FILE = "responses.txt"
-HISTORY_FILE = "chat_history.txt"
-
-DEFAULT_RESPONSES = {
-    "stress": "It's okay to feel stressed sometimes. Take a moment to breathe deeply and ground yourself. 🌱",
-    "exam": "Exams can be challenging, but you're capable of handling it. Take it one step at a time. ✨",
-    "anxiety": "Anxiety can be tough, but you're not alone. Focus on small calming steps. 💚",
-    "sad": "It's okay to feel sad sometimes. Be kind to yourself — you deserve care and rest. 💙",
-    "hello": "Hey there! I'm glad you reached out. How are you feeling today? 🌼",
-    "lonely": "Feeling lonely can be heavy. Remember you matter. 💫",
-    "tired": "You must be feeling exhausted. Rest is important — it's okay to slow down. ☁",
-    "bye": "Take care of yourself. You're doing your best, and that's enough. 🌷"
-}
-
-CAMPUS_PLACES = {
-    "Golden Jubilee Block (GJBC)": {"short": "Main academic block near the food court.", "directions": "Head southeast from the main courtyard."},
-    "Hornbill Coffee": {"short": "Coffee shop on the east side of the GJBC.", "directions": "Walk east from GJBC across the open area."},
-    "Central Library": {"short": "Central library located northwest of GJBC.", "directions": "Walk northwest from GJBC across the open area."},
-    "GJB Food Court": {"short": "Food court next to Golden Jubilee Block.", "directions": "Walk east-southeast from the GJBC main entrance."},
-    "A Block": {"short": "Central academic building with lecture halls.", "directions": "Find via main paths from the courtyard."},
-    "Boys Hostel": {"short": "Student accommodation (boys).", "directions": "Located on the eastern side of campus."},
-    "Cricket Field": {"short": "Sports field on the north side.", "directions": "Go north from central campus."}
-}
-
-POSITIVE_RESPONSES = {
-    "good": ["I'm really glad to hear you're feeling good! 😊", "That's nice to hear — keep enjoying your day! 🌱"],
-    "great": ["That's wonderful! 💚", "Love that energy! 🌟"],
-    "happy": ["That's beautiful! 😊", "Love to hear that you're feeling happy! 🌈"],
-}
-
-NEGATIVE_RESPONSES = {
-    "stress": ["It's okay to feel stressed. Take a deep breath and give yourself a moment to relax. 🌱"],
-    "tired": ["You must be feeling exhausted. Rest is important — it's okay to slow down. ☁"],
-    "anxiety": ["Anxiety can be overwhelming, but you're not alone. Focus on small calming steps and breathe deeply. 💚"],
-    "sad": ["I'm sorry you're feeling sad. It's okay to take time for yourself. 💙"],
-}
-
-NEUTRAL_RESPONSES = {
-    "hello": "Hey there! I'm glad you reached out. 🌼",
-    "hi": "Hi! It's nice to hear from you. 💚",
-    "thanks": "You're welcome 🤍",
-    "bye": "Take care of yourself. You matter 🌷"
-}
-
-REFLECTIVE_FALLBACKS = [
-    "I hear you. Would you like to tell me a little more? 💛",
-    "That sounds important… I'm here to listen. 🌿",
-    "You're not alone. Take your time, I'm here. 💚"
-]
-
-ANALYSIS_QUESTIONS = [
-    "What shall I call you?",
-    "Who do you believe you are:\nA) The body\nB) The mind\nC) The emotions\nD) The awareness\n\nChoose A, B, C, or D: ",
-    "Now tell me in one word what you feel your true nature is. Examples: peace, void, happiness, energy, silence: ",
-    "How does this void feel to you:\nA) Peaceful nothingness\nB) Powerful silence\nC) Spacious awareness\nD) Presence without identity\nE) All of the above\n\nChoose A, B, C, D, or E: "
-]
-
-def ensure_responses_file(filename=RESPONSES_FILE):
-    if not os.path.isfile(filename):
-        with open(filename, "w", encoding="utf-8") as f:
-            for k, v in DEFAULT_RESPONSES.items():
-                f.write(f"{k}:{v}\n")
-
-def load_responses(filename=RESPONSES_FILE):
-    responses = {}
-    try:
-        with open(filename, "r", encoding="utf-8") as f:
-            for line in f:
-                if ":" in line:
-                    key, value = line.strip().split(":", 1)
-                    key, value = key.lower().strip(), value.strip()
-                    if key:
-                        responses[key] = value
-    except FileNotFoundError:
-        pass
-    return responses
-
-def save_chat(user, bot, filename=HISTORY_FILE):
-    with open(filename, "a", encoding="utf-8") as f:
-        now = datetime.now().isoformat()
-        f.write(f"{now} User: {user}\n{now} Bot: {bot}\n\n")
-
-def timestamp():
-    return datetime.now().strftime("%H:%M")
-
-def get_response(user_input, file_responses):
-    text = user_input.lower()
-    for key, replies in POSITIVE_RESPONSES.items():
-        if key in text:
-            return random.choice(replies)
-    for key, replies in NEGATIVE_RESPONSES.items():
-        if key in text:
-            return random.choice(replies)
-    for key, reply in NEUTRAL_RESPONSES.items():
-        if key in text:
-            return reply
-    for key, reply in file_responses.items():
-        if key in text:
-            return reply
-    return random.choice(REFLECTIVE_FALLBACKS)
+from dispatch import LaneDispatcher, LoopLagMonitor
+from engine import CAMPUS_PLACES, ChatEngine, JourneyState, timestamp
+from message_list import WellnessMessageList
 
 # ==================================================================== 
 # --- COMBINED CHATBOT APPLICATION ---
 # ==================================================================== 
 class CombinedChatbot(wx.Frame):
     def __init__(self):
-        super()._init_(None, title="🚀 PESU Integrated Support System", size=(850, 750))
+        super().__init__(None, title="🚀 PESU Integrated Support System", size=(850, 750))
         self.SetBackgroundColour(wx.Colour(10, 15, 36))
-        ensure_responses_file()
-        self.responses = load_responses()
+        self.engine = ChatEngine()
+        self.dispatcher = LaneDispatcher(wx.CallAfter)
         
-        # Analysis state
-        self.analysis_stage = 0
-        self.analysis_data = {}
+        # Analysis state (only touched from the "wellness" lane)
+        self.journey = JourneyState()
+        # bumped on mode switch so late replies from the old mode are dropped
+        self.wellness_epoch = 0
         
         self._build_ui()
         self.Centre()
+        self.Bind(wx.EVT_CLOSE, self._on_close)
+
+        self.lag_monitor = LoopLagMonitor()
+        self.lag_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, lambda evt: self.lag_monitor.tick(), self.lag_timer)
+        self.lag_timer.Start(50)
+
+    def _on_close(self, evt):
+        self.lag_timer.Stop()
+        self.dispatcher.shutdown()
+        self.engine.close()
+        if os.environ.get("PESU_LAG_REPORT"):
+            print("event loop lag:", self.lag_monitor.stats())
+        if os.environ.get("PESU_METRICS_FILE"):
+            self.engine.metrics.dump(os.environ["PESU_METRICS_FILE"])
+        evt.Skip()
 
     def _build_ui(self):
         main_panel = wx.Panel(self)
@@ -148,17 +67,32 @@ class CombinedChatbot(wx.Frame):
         self.campus_panel = wx.Panel(self.notebook)
         self.campus_panel.SetBackgroundColour(wx.Colour(11, 18, 32))
         self.notebook.AddPage(self.campus_panel, "🗺️ Campus Assistant")
-        self._build_campus_tab()
 
         # Tab 2: Unified Wellness & Analysis
         self.wellness_panel = wx.Panel(self.notebook)
         self.wellness_panel.SetBackgroundColour(wx.Colour(240, 244, 247))
         self.notebook.AddPage(self.wellness_panel, "💚 Wellness & Inner Journey")
-        self._build_wellness_tab()
 
         main_sizer.Add(self.notebook, 1, wx.EXPAND | wx.ALL, 15)
         main_panel.SetSizer(main_sizer)
 
+        # Tab contents are built the first time each tab is shown
+        self.tab_builders = [self._build_campus_tab, self._build_wellness_tab]
+        self.built_tabs = [False] * len(self.tab_builders)
+        self.notebook.Bind(wx.EVT_NOTEBOOK_PAGE_CHANGED, self._on_tab_changed)
+        self._ensure_tab(self.notebook.GetSelection())
+
+    def _on_tab_changed(self, evt):
+        self._ensure_tab(evt.GetSelection())
+        evt.Skip()
+
+    def _ensure_tab(self, index):
+        if index < 0 or self.built_tabs[index]:
+            return
+        self.built_tabs[index] = True
+        self.tab_builders[index]()
+        self.notebook.GetPage(index).Layout()
+
     # ==================================================================== 
     # --- TAB 1: CAMPUS ASSISTANT (UNCHANGED) ---
     # ==================================================================== 
@@ -225,10 +159,8 @@ class CombinedChatbot(wx.Frame):
         self.campus_panel.SetSizer(sizer)
 
     def _on_campus_place_click(self, key):
-        info = CAMPUS_PLACES.get(key, {})
-        text = f"{key}\n\n{info.get('short','No short info')}\n\nDirections: {info.get('directions','No directions available')}"
         self._append_campus_user(f"Where is {key}?")
-        self._append_campus_bot(text)
+        self.dispatcher.submit("campus", self.engine.place_reply, self._append_campus_bot, key)
 
     def _on_campus_send(self):
         q = self.campus_input.GetValue().strip()
@@ -236,23 +168,10 @@ class CombinedChatbot(wx.Frame):
             return
         self._append_campus_user(q)
         self.campus_input.Clear()
-        resp = self._generate_campus_response(q)
-        self._append_campus_bot(resp)
+        self.dispatcher.submit("campus", self._generate_campus_response, self._append_campus_bot, q)
 
     def _generate_campus_response(self, q):
-        q_l = q.lower()
-        for key in CAMPUS_PLACES.keys():
-            if key.lower() == q_l or key.lower() in q_l or any(word in q_l.split() for word in key.lower().split()):
-                info = CAMPUS_PLACES[key]
-                return f"{key}\n\n{info.get('short','')}\n\nDirections: {info.get('directions','')}"
-        if "list" in q_l or "places" in q_l:
-            return "Places:\n" + "\n".join(f"- {k}" for k in CAMPUS_PLACES.keys())
-        if "gjbc" in q_l or "golden" in q_l:
-            key = "Golden Jubilee Block (GJBC)"
-            info = CAMPUS_PLACES.get(key)
-            if info:
-                return f"{key}\n\n{info['short']}\n\nDirections: {info['directions']}"
-        return "Sorry — I don't have an exact answer. Try clicking a place button or asking for a list."
+        return self.engine.campus_reply(q)
 
     def _append_campus_user(self, text):
         self.campus_chatbox.SetDefaultStyle(wx.TextAttr(wx.Colour(165, 214, 167)))
@@ -296,11 +215,8 @@ class CombinedChatbot(wx.Frame):
         sizer.Add(mode_panel, 0, wx.EXPAND | wx.ALL, 10)
         
         # Chat display
-        self.wellness_scroll = scrolled.ScrolledPanel(self.wellness_panel)
-        self.wellness_scroll.SetBackgroundColour(wx.Colour(240, 244, 247))
-        self.wellness_scroll_sizer = wx.BoxSizer(wx.VERTICAL)
-        self.wellness_scroll.SetSizer(self.wellness_scroll_sizer)
-        sizer.Add(self.wellness_scroll, 1, wx.EXPAND | wx.ALL, 15)
+        self.wellness_list = WellnessMessageList(self.wellness_panel)
+        sizer.Add(self.wellness_list, 1, wx.EXPAND | wx.ALL, 15)
         
         # Input area
         input_sizer = wx.BoxSizer(wx.HORIZONTAL)
@@ -325,7 +241,8 @@ class CombinedChatbot(wx.Frame):
 
     def _switch_mode(self, mode):
         self.current_mode = mode
-        self.wellness_scroll_sizer.Clear(True)
+        self.wellness_epoch += 1
+        self.wellness_list.clear()
         
         if mode == "support":
             self.mode_support.SetBackgroundColour(wx.Colour(93, 173, 226))
@@ -336,25 +253,17 @@ class CombinedChatbot(wx.Frame):
             self.mode_support.SetBackgroundColour(wx.Colour(155, 155, 155))
             self.mode_analysis.SetBackgroundColour(wx.Colour(93, 173, 226))
             self.wellness_btn.SetLabel("Start Journey")
-            self.analysis_stage = 0
-            self.analysis_data = {}
+            self.dispatcher.submit("wellness", self.journey.reset)
             self._insert_wellness_message("Inner Journey Program 🧘\nClick 'Start Journey' to begin exploring awareness and consciousness.", False)
 
     def _insert_wellness_message(self, msg, is_user=True):
-        bubble = wx.StaticText(self.wellness_scroll, label=msg)
-        bubble.Wrap(450)
-        
-        if is_user:
-            bubble.SetBackgroundColour(wx.Colour(174, 214, 241))
-            bubble.SetForegroundColour(wx.Colour(21, 67, 96))
-            self.wellness_scroll_sizer.Add(bubble, 0, wx.ALIGN_RIGHT | wx.ALL, 10)
-        else:
-            bubble.SetBackgroundColour(wx.Colour(214, 234, 248))
-            bubble.SetForegroundColour(wx.Colour(27, 38, 49))
-            self.wellness_scroll_sizer.Add(bubble, 0, wx.ALIGN_LEFT | wx.ALL, 10)
-        
-        self.wellness_scroll.SetupScrolling(scrollToTop=False)
-        self.wellness_scroll.Layout()
+        self.wellness_list.append(msg, is_user)
+
+    def _insert_wellness_later(self, delay, msg, epoch):
+        def show():
+            if epoch == self.wellness_epoch:
+                self._insert_wellness_message(msg, False)
+        wx.CallLater(delay, show)
 
     def _on_wellness_send(self):
         if self.current_mode == "support":
@@ -370,17 +279,23 @@ class CombinedChatbot(wx.Frame):
         self._insert_wellness_message(user_msg, True)
         self.wellness_input.Clear()
         
-        bot_reply = get_response(user_msg, self.responses)
-        wx.CallLater(300, lambda: self._insert_wellness_message(bot_reply, False))
-        save_chat(user_msg, bot_reply)
+        epoch = self.wellness_epoch
+        self.dispatcher.submit("wellness", self.engine.support_reply,
+                               lambda reply: self._insert_wellness_later(300, reply, epoch), user_msg)
+
+    def _journey_job(self, user_input):
+        # runs on the wellness lane; reports completion with the replies
+        replies = self.engine.journey_reply(self.journey, user_input)
+        return replies, self.journey.started
 
     def _handle_analysis_mode(self):
         user_input = self.wellness_input.GetValue().strip()
+        epoch = self.wellness_epoch
         
-        if self.analysis_stage == 0 and self.wellness_btn.GetLabel() == "Start Journey":
+        if self.wellness_btn.GetLabel() == "Start Journey":
             self.wellness_btn.SetLabel("Submit")
-            self._insert_wellness_message("Welcome to the Inner Journey. Let's begin...", False)
-            wx.CallLater(500, self._next_analysis_question)
+            self.dispatcher.submit("wellness", self._journey_job,
+                                   lambda result: self._show_journey_start(result, epoch), "")
             return
         
         if not user_input:
@@ -389,53 +304,37 @@ class CombinedChatbot(wx.Frame):
         self._insert_wellness_message(user_input, True)
         self.wellness_input.Clear()
         
-        # Store answer
-        if self.analysis_stage == 0:
-            self.analysis_data['name'] = user_input
-        elif self.analysis_stage == 1:
-            self.analysis_data['who'] = user_input
-        elif self.analysis_stage == 2:
-            self.analysis_data['nature'] = user_input
-        elif self.analysis_stage == 3:
-            self.analysis_data['void'] = user_input
-        
-        self.analysis_stage += 1
-        
-        if self.analysis_stage < len(ANALYSIS_QUESTIONS):
-            wx.CallLater(500, self._next_analysis_question)
-        else:
-            wx.CallLater(500, self._show_analysis_summary)
-
-    def _next_analysis_question(self):
-        if self.analysis_stage < len(ANALYSIS_QUESTIONS):
-            question = ANALYSIS_QUESTIONS[self.analysis_stage]
-            self._insert_wellness_message(f"[{self.analysis_stage+1}] {question}", False)
-
-    def _show_analysis_summary(self):
-        name = self.analysis_data.get('name', 'Traveller')
-        who = self.analysis_data.get('who', 'not given')
-        nature = self.analysis_data.get('nature', 'undefined')
-        
-        summary = f"""Analysis Complete for {name}
+        self.dispatcher.submit("wellness", self._journey_job,
+                               lambda result: self._show_analysis_replies(result, epoch), user_input)
 
-Your Exploration:
-- Primary belief of self: {who.upper()}
-- True nature: {nature.upper()}
-
-"""
-        if who.lower() == 'd' or 'awareness' in who.lower():
-            summary += "This aligns with pure awareness. 🌙\n"
-        
-        summary += "\nThank you for this inner journey, traveller of consciousness."
-        
-        self._insert_wellness_message(summary, False)
-        self.wellness_btn.SetLabel("Start Journey")
-        self.analysis_stage = 0
-        self.analysis_data = {}
+    def _show_journey_start(self, result, epoch):
+        if epoch != self.wellness_epoch:
+            return
+        (welcome, question), _ = result
+        self._insert_wellness_message(welcome, False)
+        self._insert_wellness_later(500, question, epoch)
+
+    def _show_analysis_replies(self, result, epoch):
+        replies, started = result
+        def show():
+            if epoch != self.wellness_epoch:
+                return
+            for reply in replies:
+                self._insert_wellness_message(reply, False)
+            if not started:
+                self.wellness_btn.SetLabel("Start Journey")
+        wx.CallLater(500, show)
+
+def report_startup():
+    metric = {"metric": "startup_to_prompt_s", "frontend": "gui", "value": time.perf_counter() - STARTED}
+    print(json.dumps(metric), file=sys.stderr)
 
 # ---------------------- RUN ----------------------
-if __name__ == "_main_":
+if __name__ == "__main__":
     app = wx.App()
     frame = CombinedChatbot()
     frame.Show()
+    if os.environ.get("PESU_STARTUP_REPORT"):
+        # runs once the event loop is up and the window can take input
+        wx.CallAfter(report_startup)
     app.MainLoop()
\ No newline at end of file
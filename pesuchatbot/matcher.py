@@ -0,0 +1,134 @@
+import re
+from collections import deque
+
+# ====================================================================
+# --- COMPILED KEYWORD MATCHER ---
+# ====================================================================
+# Aho-Corasick automaton over every keyword of every response tier.
+# One pass over the message finds all keyword occurrences; each state
+# keeps the best (tier, rank) reachable through its failure chain, so the
+# scan only has to track a running minimum.  Lower tier wins, then
+# earlier dict position within the tier - the same answer the old chain
+# of `key in text` loops gave.
+
+def keyword_normalizer(key_chars):
+    # Returns normalize(text) -> lowercased text with every run of
+    # characters that no keyword contains (punctuation, spacing, ...)
+    # collapsed to one separator, and such runs stripped from the ends.
+    # No keyword can match across such a run, so the normalized text
+    # matches exactly the same keywords as text.lower().
+    sep = "\x00"
+    if sep in key_chars:
+        return str.lower
+    other = re.compile("[^" + "".join(re.escape(ch) for ch in sorted(key_chars)) + "]+") if key_chars else re.compile(".+", re.S)
+
+    def normalize(text):
+        return other.sub(sep, text.lower()).strip(sep)
+    return normalize
+
+class ResponseMatcher:
+    def __init__(self, tiers):
+        # tiers: list of dicts {keyword: [reply, ...]} in priority order
+        self.tiers = [dict(tier) for tier in tiers]
+        self.keys = [list(tier.keys()) for tier in self.tiers]
+        self._always = None
+        self._empty = []
+        self._build()
+        self.normalize = keyword_normalizer({ch for goto in self._goto for ch in goto})
+
+    def _build(self):
+        goto = [{}]
+        best = [None]
+        own = {}
+        for t, tier in enumerate(self.tiers):
+            for r, key in enumerate(tier.keys()):
+                rank = (t, r)
+                if not key:
+                    # "" in text is always true
+                    if self._always is None or rank < self._always:
+                        self._always = rank
+                    self._empty.append(rank)
+                    continue
+                node = 0
+                for ch in key:
+                    nxt = goto[node].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[node][ch] = nxt
+                        goto.append({})
+                        best.append(None)
+                    node = nxt
+                if best[node] is None or rank < best[node]:
+                    best[node] = rank
+                own.setdefault(node, []).append(rank)
+
+        fail = [0] * len(goto)
+        # nearest proper suffix that ends a keyword, for findall()
+        out_link = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                if node:
+                    f = fail[node]
+                    while f and ch not in goto[f]:
+                        f = fail[f]
+                    fail[nxt] = goto[f].get(ch, 0)
+                    out_link[nxt] = fail[nxt] if fail[nxt] in own else out_link[fail[nxt]]
+                inherited = best[fail[nxt]]
+                if inherited is not None and (best[nxt] is None or inherited < best[nxt]):
+                    best[nxt] = inherited
+                queue.append(nxt)
+
+        self._goto = goto
+        self._fail = fail
+        self._own = own
+        self._out_link = out_link
+        self._best = best
+
+    def match(self, text):
+        # Returns (tier_index, key) of the winning keyword, or None.
+        goto, fail, best = self._goto, self._fail, self._best
+        found = self._always
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            rank = best[node]
+            if rank is not None and (found is None or rank < found):
+                found = rank
+                if found == (0, 0):
+                    break
+        if found is None:
+            return None
+        t, r = found
+        return t, self.keys[t][r]
+
+    def findall(self, text):
+        # Returns the set of every (tier_index, key) occurring in text.
+        goto, fail, own, out_link = self._goto, self._fail, self._own, self._out_link
+        ranks = set(self._empty)
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            hit = node if node in own else out_link[node]
+            while hit:
+                ranks.update(own[hit])
+                hit = out_link[hit]
+        return {(t, self.keys[t][r]) for t, r in ranks}
+
+    def resolve(self, text):
+        # Returns (tier_index, reply list) of the winning keyword, or None.
+        hit = self.match(text)
+        if hit is None:
+            return None
+        t, key = hit
+        return t, self.tiers[t][key]
+
+    def candidates(self, text):
+        # Returns the reply list of the winning keyword, or None.
+        hit = self.resolve(text)
+        return None if hit is None else hit[1]
@@ -0,0 +1,85 @@
+from array import array
+import wx
+from wx.lib.wordwrap import wordwrap
+
+# ====================================================================
+# --- VIRTUALIZED WELLNESS MESSAGE LIST ---
+# ====================================================================
+# Owner-drawn wx.VListBox: messages live in a compact model (wrapped
+# text + one flag byte + cached bubble size), and wx only asks us to
+# draw the rows that are on screen.  Appending measures the new message
+# once and bumps the item count; earlier bubbles are never laid out
+# again, however long the session gets.
+
+WRAP_WIDTH = 450
+BUBBLE_PADDING = 8
+ROW_MARGIN = 10
+BUBBLE_RADIUS = 8
+
+BACKGROUND = wx.Colour(240, 244, 247)
+USER_BUBBLE = (wx.Colour(174, 214, 241), wx.Colour(21, 67, 96))
+BOT_BUBBLE = (wx.Colour(214, 234, 248), wx.Colour(27, 38, 49))
+
+class WellnessMessageList(wx.VListBox):
+    def __init__(self, parent):
+        super().__init__(parent, style=wx.BORDER_NONE)
+        self.SetBackgroundColour(BACKGROUND)
+        self._texts = []
+        self._is_user = bytearray()
+        self._widths = array("H")
+        self._heights = array("H")
+        self.SetItemCount(0)
+
+    def append(self, text, is_user=False):
+        dc = wx.ClientDC(self)
+        dc.SetFont(self.GetFont())
+        wrapped = wordwrap(text, WRAP_WIDTH, dc)
+        width, height, _ = dc.GetFullMultiLineTextExtent(wrapped)
+        self._texts.append(wrapped)
+        self._is_user.append(1 if is_user else 0)
+        self._widths.append(min(width, 0xFFFF))
+        self._heights.append(min(height, 0xFFFF))
+
+        count = len(self._texts)
+        self.SetItemCount(count)
+        self.RefreshRow(count - 1)
+        self.ScrollToRow(count - 1)
+
+    def clear(self):
+        self._texts = []
+        self._is_user = bytearray()
+        self._widths = array("H")
+        self._heights = array("H")
+        self.SetItemCount(0)
+        self.Refresh()
+
+    def __len__(self):
+        return len(self._texts)
+
+    # ---------------------- VListBox HOOKS ----------------------
+    def OnMeasureItem(self, n):
+        return self._heights[n] + 2 * (BUBBLE_PADDING + ROW_MARGIN)
+
+    def OnDrawBackground(self, dc, rect, n):
+        # chat rows are not selectable; never paint a highlight
+        dc.SetBrush(wx.Brush(BACKGROUND))
+        dc.SetPen(wx.TRANSPARENT_PEN)
+        dc.DrawRectangle(rect)
+
+    def OnDrawItem(self, dc, rect, n):
+        is_user = self._is_user[n]
+        bg, fg = USER_BUBBLE if is_user else BOT_BUBBLE
+        width = self._widths[n] + 2 * BUBBLE_PADDING
+        height = self._heights[n] + 2 * BUBBLE_PADDING
+        if is_user:
+            x = rect.x + rect.width - ROW_MARGIN - width
+        else:
+            x = rect.x + ROW_MARGIN
+        y = rect.y + ROW_MARGIN
+
+        dc.SetBrush(wx.Brush(bg))
+        dc.SetPen(wx.TRANSPARENT_PEN)
+        dc.DrawRoundedRectangle(x, y, width, height, BUBBLE_RADIUS)
+        dc.SetFont(self.GetFont())
+        dc.SetTextForeground(fg)
+        dc.DrawText(self._texts[n], x + BUBBLE_PADDING, y + BUBBLE_PADDING)
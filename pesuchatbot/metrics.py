@@ -0,0 +1,153 @@
+import bisect
+import json
+import os
+import threading
+
+# ====================================================================
+# --- METRICS ---
+# ====================================================================
+# Counters and latency histograms cheap enough to leave on: recording is
+# a dict lookup, a bisect into fixed bucket bounds and two adds under a
+# lock.  Numbers other objects already keep (history bytes written,
+# reload counts, session stats) are not mirrored on every write; they are
+# pulled in by collectors when metrics are exported.
+#   prometheus()  Prometheus text exposition format
+#   snapshot()    plain dict, for JSON
+#   dump(path)    snapshot written to a file (atomic replace)
+#
+# Labels are passed as a tuple of (name, value) pairs so the hot path
+# does not build or sort a dict:  metrics.inc("responses_total", (("source", "file"),))
+
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def quantile(self, q):
+        # upper bound of the bucket holding the q-th observation
+        total = self.count
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+def _label_text(labels, extra=()):
+    pairs = tuple(labels) + tuple(extra)
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metrics:
+    def __init__(self, prefix="pesu"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}     # (name, labels) -> number
+        self._histograms = {}   # (name, labels) -> Histogram
+        self._help = {}
+        self._collectors = []
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def add_collector(self, collect):
+        # collect() -> iterable of (name, "counter" | "gauge", labels, value)
+        self._collectors.append(collect)
+
+    def inc(self, name, labels=(), amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, labels=()):
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def _collected(self):
+        for collect in self._collectors:
+            yield from collect()
+
+    # ---------------------- EXPORT ----------------------
+    def snapshot(self):
+        with self._lock:
+            counters = list(self._counters.items())
+            histograms = [(key, list(h.counts), h.sum, h) for key, h in self._histograms.items()]
+        result = {"counters": [], "gauges": [], "histograms": []}
+        for (name, labels), value in counters:
+            result["counters"].append({"name": name, "labels": dict(labels), "value": value})
+        for name, kind, labels, value in self._collected():
+            group = "counters" if kind == "counter" else "gauges"
+            result[group].append({"name": name, "labels": dict(labels), "value": value})
+        for (name, labels), counts, total, h in histograms:
+            result["histograms"].append({
+                "name": name,
+                "labels": dict(labels),
+                "count": sum(counts),
+                "sum": total,
+                "buckets": dict(zip([str(b) for b in h.bounds] + ["+Inf"], counts)),
+                "p50": h.quantile(0.5),
+                "p99": h.quantile(0.99),
+            })
+        return result
+
+    def prometheus(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(h.counts), h.sum, h.bounds) for key, h in self._histograms.items())
+        families = {}
+        for (name, labels), value in counters:
+            families.setdefault((name, "counter"), []).append(f"{self.prefix}_{name}{_label_text(labels)} {_number(value)}")
+        for name, kind, labels, value in self._collected():
+            families.setdefault((name, kind), []).append(f"{self.prefix}_{name}{_label_text(labels)} {_number(value)}")
+        for (name, labels), counts, total, bounds in histograms:
+            lines = families.setdefault((name, "histogram"), [])
+            running = 0
+            for bound, n in zip(bounds + (float("inf"),), counts):
+                running += n
+                lines.append(f"{self.prefix}_{name}_bucket{_label_text(labels, [('le', _number(bound))])} {running}")
+            lines.append(f"{self.prefix}_{name}_sum{_label_text(labels)} {_number(total)}")
+            lines.append(f"{self.prefix}_{name}_count{_label_text(labels)} {running}")
+
+        out = []
+        for (name, kind), lines in families.items():
+            if name in self._help:
+                out.append(f"# HELP {self.prefix}_{name} {self._help[name]}")
+            out.append(f"# TYPE {self.prefix}_{name} {kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+    def dump(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp, path)
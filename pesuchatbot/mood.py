@@ -0,0 +1,185 @@
+import math
+import re
+from itertools import repeat
+import numpy as np
+from engine import NEGATIVE_RESPONSES, NEUTRAL_RESPONSES, POSITIVE_RESPONSES, RESPONSES_FILE, load_responses
+
+# ====================================================================
+# --- BATCHED MOOD CLASSIFICATION ---
+# ====================================================================
+# A small TF-IDF model built from the response tables and responses.txt.
+# Each mood is one "document": its trigger keywords (boosted) plus the
+# words of its replies.  The model is a (features x moods) weight
+# matrix; a batch of messages is scored by collecting every feature hit
+# as (message row, feature column) pairs and summing weight rows with one
+# NumPy bincount per mood, instead of looping over moods per message.
+#
+# Features are (a) trigger keywords and (b) word tokens from the reply
+# texts, weighted far below keywords since words like "time" or "okay"
+# say little about the user's mood.  Unlike get_response's substring
+# rule, a keyword must match whole words: keywords of up to
+# SHORT_KEYWORD characters exactly ("hi" not in "his" or "nothing"),
+# longer ones also with an inflection ("stressed", "exams", but "good"
+# not in "goodbye").
+#
+# The batch is lowercased and joined once; keywords and tokens are found
+# by two regex scans over the joined text (in C), and words are mapped to
+# feature ids with one map(), so there is no per-message Python loop.
+# Of keywords starting at the same position only the longest counts.
+#
+# Confidence is a softmax over the mood scores plus an UNKNOWN score of
+# UNKNOWN_PRIOR: a message needs about one keyword's worth of evidence to
+# get a mood at all, and one hit is far from certain.
+#
+# responses.txt keys get their mood from, in order: the caller's
+# file_moods, FILE_KEY_MOODS, the built-in keyword they repeat, or the
+# built-in model run over the key and reply text.  Keys that stay
+# unknown add no evidence.
+
+MOODS = ["positive", "negative", "neutral"]
+UNKNOWN = "unknown"
+
+# default moods for responses.txt keys that are not built-in keywords
+FILE_KEY_MOODS = {
+    "exam": "negative", "lonely": "negative", "angry": "negative", "cry": "negative",
+    "depressed": "negative", "worried": "negative", "scared": "negative", "upset": "negative",
+    "excited": "positive", "proud": "positive", "calm": "positive",
+}
+
+KEYWORD_BOOST = 3.0
+TOKEN_WEIGHT = 0.1      # total weight of one reply-text token over all moods
+UNKNOWN_PRIOR = 1.0
+SHORT_KEYWORD = 3
+STEM_SUFFIXES = ("s", "es", "ed", "d", "ing", "ness", "ful", "ly", "y", "er", "est")
+TOKEN_RE = re.compile(r"[a-z]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "be", "but", "for", "i", "i'm", "in", "is", "it", "it's",
+    "m", "of", "on", "re", "s", "that", "the", "this", "to", "you", "your", "yourself",
+    "t", "ll", "ve", "with",
+}
+SEP = "\x00"   # between the messages of a batch; never part of a word
+TOKEN_OR_SEP = re.compile(r"[a-z]+|\x00")
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+def keyword_pattern(keywords):
+    # group 1: a long keyword, maybe inflected; group 2: a short one
+    def alternation(keys):
+        return "|".join(re.escape(k) for k in sorted(keys, key=len, reverse=True)) or "(?!)"
+    long_keys = [k for k in keywords if len(k) > SHORT_KEYWORD]
+    short_keys = [k for k in keywords if len(k) <= SHORT_KEYWORD]
+    suffixes = "|".join(sorted(STEM_SUFFIXES, key=len, reverse=True))
+    return re.compile(rf"(?<!\w)(?:({alternation(long_keys)})(?:{suffixes})?|({alternation(short_keys)}))(?!\w)")
+
+class MoodModel:
+    def __init__(self, mood_tables):
+        # mood_tables: list of (mood, {keyword: [reply, ...]})
+        keyword_moods = {}
+        docs = {mood: {} for mood in MOODS}
+        for mood, table in mood_tables:
+            for key, replies in table.items():
+                if key:
+                    keyword_moods.setdefault(key, mood)
+                for reply in replies:
+                    for token in tokenize(reply):
+                        docs[mood][token] = docs[mood].get(token, 0) + 1
+
+        self.keywords = list(keyword_moods)
+        self.keyword_ids = {k: i for i, k in enumerate(self.keywords)}
+        self.tokens = sorted({t for counts in docs.values() for t in counts})
+        self.token_ids = {t: i + len(self.keywords) for i, t in enumerate(self.tokens)}
+        self.keyword_moods = keyword_moods
+        self._keyword_re = keyword_pattern(self.keywords)
+        self._word_ids = dict(self.token_ids)
+        self._word_ids[SEP] = -2
+
+        n_moods = len(MOODS)
+        weights = np.zeros((len(self.keywords) + len(self.tokens), n_moods), dtype=np.float32)
+        for i, key in enumerate(self.keywords):
+            weights[i, MOODS.index(keyword_moods[key])] = KEYWORD_BOOST
+        for m, mood in enumerate(MOODS):
+            counts = docs[mood]
+            total = sum(counts.values()) or 1
+            for token, count in counts.items():
+                df = sum(1 for other in docs.values() if token in other)
+                idf = math.log((1 + n_moods) / (1 + df)) + 1
+                weights[self.token_ids[token], m] = (count / total) * idf
+        # each token row sums to TOKEN_WEIGHT so reply words cannot outvote keywords
+        token_rows = weights[len(self.keywords):]
+        sums = token_rows.sum(axis=1, keepdims=True) / TOKEN_WEIGHT
+        np.divide(token_rows, sums, out=token_rows, where=sums > 0)
+        self.weights = weights
+
+    @classmethod
+    def from_tables(cls, file_responses=None, file_moods=None):
+        # file_moods: optional {key: mood} for responses.txt keys
+        if file_responses is None:
+            file_responses = load_responses(RESPONSES_FILE)
+        tables = [
+            ("positive", POSITIVE_RESPONSES),
+            ("negative", NEGATIVE_RESPONSES),
+            ("neutral", {k: [v] for k, v in NEUTRAL_RESPONSES.items()}),
+        ]
+        builtin = cls(tables)
+        file_moods = file_moods or {}
+        for key, reply in file_responses.items():
+            mood = file_moods.get(key) or FILE_KEY_MOODS.get(key) or builtin.keyword_moods.get(key)
+            if mood is None:
+                mood = builtin.classify([f"{key} {reply}"])[0][0]
+            if mood != UNKNOWN:
+                tables.append((mood, {key: [reply]}))
+        return cls(tables)
+
+    def features(self, messages):
+        # (rows, cols) index arrays of every distinct feature hit in the batch
+        text = SEP.join(messages).lower()
+        if text.count(SEP) != max(len(messages) - 1, 0):
+            text = SEP.join(m.replace(SEP, " ") for m in messages).lower()
+
+        # keywords: few hits, rows by counting separators between them
+        keyword_ids = self.keyword_ids
+        rows, cols = [], []
+        row = prev = 0
+        for m in self._keyword_re.finditer(text):
+            row += text.count(SEP, prev, m.start())
+            prev = m.start()
+            rows.append(row)
+            cols.append(keyword_ids[m.group(1) or m.group(2)])
+
+        # tokens: every word, rows from a running count of separators
+        words = TOKEN_OR_SEP.findall(text)
+        ids = np.fromiter(map(self._word_ids.get, words, repeat(-1)), np.intp, len(words))
+        token_rows = np.cumsum(ids == -2)
+        hit = ids >= 0
+
+        n_features = len(self.weights)
+        codes = np.unique(np.concatenate([
+            np.asarray(rows, dtype=np.intp) * n_features + np.asarray(cols, dtype=np.intp),
+            token_rows[hit] * n_features + ids[hit],
+        ]))
+        return codes // n_features, codes % n_features
+
+    def scores(self, messages):
+        # (len(messages) x len(MOODS)) score matrix
+        rows, cols = self.features(messages)
+        hits = self.weights[cols]
+        n = len(messages)
+        columns = [np.bincount(rows, weights=hits[:, m], minlength=n) for m in range(len(MOODS))]
+        return np.stack(columns, axis=1).astype(np.float32)
+
+    def classify(self, messages):
+        # Returns (labels, confidences) for a list of messages.
+        scores = self.scores(messages)
+        scores = np.hstack([scores, np.full((len(scores), 1), UNKNOWN_PRIOR, np.float32)])
+        best = scores.argmax(axis=1)
+        odds = np.exp(scores - scores.max(axis=1, keepdims=True))
+        confidence = 1.0 / odds.sum(axis=1)   # softmax probability of the best label
+        labels = np.array(MOODS + [UNKNOWN], dtype=object)[best]
+        return labels.tolist(), confidence
+
+def classify_moods(messages, model=None):
+    # Convenience wrapper: [(label, confidence), ...]
+    model = model or MoodModel.from_tables()
+    labels, confidence = model.classify(messages)
+    return list(zip(labels, confidence.tolist()))
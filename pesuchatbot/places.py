@@ -0,0 +1,140 @@
+import math
+import re
+
+# ====================================================================
+# --- CAMPUS PLACE INDEX ---
+# ====================================================================
+# Built once from the place table:
+#   - token inverted index (name + alias tokens -> places), IDF weighted
+#   - phrase table for full names and aliases ("a block", "gjbc")
+#   - trigram index over the token vocabulary for typo tolerance
+# A lookup touches only the postings of the query's own tokens, so its
+# cost depends on the query, not on how many places are loaded.
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "where", "what", "how", "do", "i", "to",
+    "get", "go", "of", "in", "on", "at", "me", "my", "find", "can", "you",
+    "tell", "about", "there", "near", "please", "which", "way", "show",
+}
+
+MAX_PHRASE_TOKENS = 6
+PHRASE_BONUS = 3.0
+FUZZY_MIN_LENGTH = 4
+FUZZY_PENALTY = 0.8
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a, b, limit):
+    # Damerau (adjacent transposition) distance, or limit + 1 once it is
+    # certain to exceed limit
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if prev2 is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                d = min(d, prev2[j - 2] + 1)
+            cur.append(d)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+def place_aliases(name, info):
+    aliases = [name]
+    # "Golden Jubilee Block (GJBC)" -> "Golden Jubilee Block", "GJBC"
+    for inner in re.findall(r"\(([^)]*)\)", name):
+        aliases.append(inner)
+    stripped = re.sub(r"\([^)]*\)", "", name).strip()
+    if stripped != name:
+        aliases.append(stripped)
+    aliases.extend(info.get("aliases", ()))
+    return aliases
+
+class PlaceIndex:
+    def __init__(self, places):
+        self.places = places
+        self.names = list(places.keys())
+        self.postings = {}
+        self.phrases = {}
+        self.grams = {}
+
+        for pid, name in enumerate(self.names):
+            for alias in place_aliases(name, places[name]):
+                tokens = tokenize(alias)
+                if not tokens:
+                    continue
+                self.phrases.setdefault(tuple(tokens), set()).add(pid)
+                for token in tokens:
+                    self.postings.setdefault(token, set()).add(pid)
+
+        n = len(self.names)
+        self.idf = {t: math.log(1 + n / len(pids)) for t, pids in self.postings.items()}
+        for token in self.postings:
+            if len(token) >= FUZZY_MIN_LENGTH - 1:
+                for gram in trigrams(token):
+                    self.grams.setdefault(gram, set()).add(token)
+
+    def _fuzzy(self, token):
+        # vocabulary tokens within a small edit distance of `token`
+        counts = {}
+        grams = trigrams(token)
+        for gram in grams:
+            for candidate in self.grams.get(gram, ()):
+                counts[candidate] = counts.get(candidate, 0) + 1
+        limit = 1 if len(token) < 7 else 2
+        matches = []
+        for candidate, shared in counts.items():
+            # cheap trigram filter before the edit-distance check
+            if shared * 3 < len(grams):
+                continue
+            d = edit_distance(token, candidate, limit)
+            if d <= limit:
+                matches.append((candidate, d))
+        return matches
+
+    def search(self, query, limit=5):
+        # Returns [(score, place name), ...] best first.
+        tokens = tokenize(query)
+        scores = {}
+
+        for token in tokens:
+            if token in STOPWORDS:
+                continue
+            pids = self.postings.get(token)
+            if pids:
+                for pid in pids:
+                    scores[pid] = scores.get(pid, 0.0) + self.idf[token]
+            elif len(token) >= FUZZY_MIN_LENGTH:
+                best = {}
+                for candidate, d in self._fuzzy(token):
+                    weight = self.idf[candidate] * FUZZY_PENALTY * (1 - d / (len(candidate) + 1))
+                    for pid in self.postings[candidate]:
+                        if weight > best.get(pid, 0.0):
+                            best[pid] = weight
+                for pid, weight in best.items():
+                    scores[pid] = scores.get(pid, 0.0) + weight
+
+        for i in range(len(tokens)):
+            for j in range(i + 1, min(len(tokens), i + MAX_PHRASE_TOKENS) + 1):
+                pids = self.phrases.get(tuple(tokens[i:j]))
+                if pids:
+                    for pid in pids:
+                        scores[pid] = scores.get(pid, 0.0) + PHRASE_BONUS * (j - i)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(score, self.names[pid]) for pid, score in ranked[:limit]]
+
+    def best(self, query):
+        hits = self.search(query, 1)
+        return hits[0][1] if hits else None
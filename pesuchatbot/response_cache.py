@@ -0,0 +1,76 @@
+import threading
+from collections import OrderedDict
+
+# ====================================================================
+# --- RESPONSE CACHE ---
+# ====================================================================
+# LRU cache in front of the keyword matcher.  The key is the input as
+# normalized by the table's matcher (case, punctuation and spacing that
+# no keyword contains are folded away, see keyword_normalizer), so "Sad!",
+# "sad" and "  SAD  " share one entry.  The value is the matcher's
+# resolve() result - (tier, reply list) or None - not a chosen reply, so
+# random.choice still picks a fresh variant on every hit.
+#
+# Entries belong to one table version.  The store's reload listener
+# clears the cache, and a lookup made with an older table (a request
+# that raced a reload) neither reads nor fills it.
+
+_MISSING = object()
+
+class ResponseCache:
+    def __init__(self, max_entries=10_000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def invalidate(self, table=None):
+        # ResponseStore listener: drop everything cached for the old table
+        with self._lock:
+            self._entries.clear()
+            self._version = None if table is None else table.version
+            self.invalidations += 1
+
+    def resolve(self, table, text):
+        # Same result as table.matcher.resolve(text.lower()).
+        key = table.matcher.normalize(text)
+        version = table.version
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._entries.clear()
+                self._version = version
+            current = version == self._version
+            hit = self._entries.get(key, _MISSING) if current else _MISSING
+            if hit is not _MISSING:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return hit
+            self.misses += 1
+
+        result = table.matcher.resolve(key)
+        if current and self.max_entries > 0:
+            with self._lock:
+                if version == self._version:
+                    self._entries[key] = result
+                    if len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+        return result
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,109 @@
+import logging
+import os
+import threading
+import time
+
+# ====================================================================
+# --- HOT-RELOADABLE RESPONSE STORE ---
+# ====================================================================
+# Holds the current ResponseTable (file responses + derived matcher).
+# current() stats the file at most every `check_interval` seconds and,
+# when mtime/size/inode changed, starts a background thread to re-parse
+# it; requests keep getting the old table until the new one is ready.
+# A new table is fully built before it is swapped in with one attribute
+# assignment, so a caller always sees either the old table or the new
+# one, never a mix.
+
+log = logging.getLogger(__name__)
+
+def _file_signature(filename):
+    try:
+        st = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+class ResponseTable:
+    def __init__(self, responses, matcher, version, signature):
+        self.responses = responses
+        self.matcher = matcher
+        self.version = version
+        self.signature = signature
+
+class ResponseStore:
+    def __init__(self, filename, build, check_interval=1.0):
+        # build(filename) -> (responses, matcher)
+        self.filename = filename
+        self.build = build
+        self.check_interval = check_interval
+        self.reload_count = 0
+        self.last_reload_seconds = 0.0
+        self.total_reload_seconds = 0.0
+        self.reload_errors = 0
+        self._lock = threading.Lock()
+        self._reloader = None
+        self._next_check = 0.0
+        self._table = None
+        self._listeners = []
+        self.reload()
+
+    def add_listener(self, callback):
+        # callback(table) runs after every swap
+        self._listeners.append(callback)
+
+    def current(self):
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            if _file_signature(self.filename) != self._table.signature:
+                self._reload_in_background()
+        return self._table
+
+    def _reload_in_background(self):
+        # never parses on the caller's thread; one reload at a time
+        if self._reloader is not None and self._reloader.is_alive():
+            return
+        self._reloader = threading.Thread(target=self._background_reload, name="response-reload", daemon=True)
+        self._reloader.start()
+
+    def _background_reload(self):
+        try:
+            self.reload()
+        except Exception:
+            # keep serving the old table; the next check retries
+            self.reload_errors += 1
+            log.exception("reloading %s failed", self.filename)
+
+    def reload(self):
+        with self._lock:
+            signature = _file_signature(self.filename)
+            if self._table is not None and signature == self._table.signature:
+                return self._table  # another thread got here first
+            start = time.perf_counter()
+            for _ in range(3):
+                responses, matcher = self.build(self.filename)
+                after = _file_signature(self.filename)
+                if after == signature:
+                    break
+                # file changed while we were reading it; read it again
+                signature = after
+            version = 1 if self._table is None else self._table.version + 1
+            table = ResponseTable(responses, matcher, version, signature)
+            elapsed = time.perf_counter() - start
+            self._table = table
+            if version > 1:
+                self.reload_count += 1
+            self.last_reload_seconds = elapsed
+            self.total_reload_seconds += elapsed
+        for callback in self._listeners:
+            callback(table)
+        return table
+
+    def stats(self):
+        return {
+            "version": self._table.version,
+            "reload_count": self.reload_count,
+            "last_reload_seconds": self.last_reload_seconds,
+            "total_reload_seconds": self.total_reload_seconds,
+            "reload_errors": self.reload_errors,
+        }
@@ -0,0 +1,113 @@
+import heapq
+import json
+import math
+
+# ====================================================================
+# --- CAMPUS GRAPH & ROUTING ---
+# ====================================================================
+# Places (and path junctions) are nodes with map coordinates in metres
+# (x east, y north); walkable paths are undirected edges with a length.
+# Router keeps one Dijkstra shortest-path tree per source node, either
+# all built up front (precompute) or filled in lazily on first use, so a
+# route answer is a dictionary lookup plus a walk back along the tree.
+
+COMPASS = ["east", "northeast", "north", "northwest", "west", "southwest", "south", "southeast"]
+
+class CampusGraph:
+    def __init__(self):
+        self.coords = {}
+        self.adj = {}
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        graph = cls()
+        for name, node in data.get("nodes", {}).items():
+            graph.add_node(name, node.get("x", 0), node.get("y", 0))
+        for edge in data.get("edges", []):
+            graph.add_edge(edge["from"], edge["to"], edge.get("distance"))
+        return graph
+
+    def add_node(self, name, x, y):
+        self.coords[name] = (x, y)
+        self.adj.setdefault(name, [])
+
+    def add_edge(self, a, b, distance=None):
+        if a not in self.coords or b not in self.coords:
+            raise ValueError(f"edge {a!r} - {b!r} references an unknown node")
+        if distance is None:
+            (ax, ay), (bx, by) = self.coords[a], self.coords[b]
+            distance = math.hypot(bx - ax, by - ay)
+        self.adj[a].append((b, distance))
+        self.adj[b].append((a, distance))
+
+    def heading(self, a, b):
+        (ax, ay), (bx, by) = self.coords[a], self.coords[b]
+        angle = math.degrees(math.atan2(by - ay, bx - ax)) % 360
+        return COMPASS[int((angle + 22.5) // 45) % 8]
+
+class Route:
+    def __init__(self, path, distance, steps):
+        self.path = path
+        self.distance = distance
+        self.steps = steps
+
+    def describe(self):
+        start, end = self.path[0], self.path[-1]
+        lines = [f"Route from {start} to {end} (about {round(self.distance)} m):"]
+        lines += [f"{i}. {step}" for i, step in enumerate(self.steps, 1)]
+        return "\n".join(lines)
+
+class Router:
+    def __init__(self, graph, precompute=False):
+        self.graph = graph
+        self._trees = {}
+        if precompute:
+            self.precompute()
+
+    def precompute(self):
+        for source in self.graph.adj:
+            self._tree(source)
+
+    def _tree(self, source):
+        tree = self._trees.get(source)
+        if tree is None:
+            dist = {source: 0.0}
+            prev = {}
+            heap = [(0.0, source)]
+            while heap:
+                d, node = heapq.heappop(heap)
+                if d > dist[node]:
+                    continue
+                for nxt, w in self.graph.adj[node]:
+                    nd = d + w
+                    if nd < dist.get(nxt, math.inf):
+                        dist[nxt] = nd
+                        prev[nxt] = node
+                        heapq.heappush(heap, (nd, nxt))
+            tree = self._trees[source] = (dist, prev)
+        return tree
+
+    def distance(self, source, target):
+        if source not in self.graph.adj or target not in self.graph.adj:
+            return None
+        return self._tree(source)[0].get(target)
+
+    def route(self, source, target):
+        # Returns a Route, or None when either end is unknown/unreachable.
+        if self.distance(source, target) is None:
+            return None
+        dist, prev = self._tree(source)
+        path = [target]
+        while path[-1] != source:
+            path.append(prev[path[-1]])
+        path.reverse()
+
+        steps = []
+        for a, b in zip(path, path[1:]):
+            leg = dist[b] - dist[a]
+            steps.append(f"Head {self.graph.heading(a, b)} for about {round(leg)} m to {b}.")
+        if not steps:
+            steps.append(f"You are already at {target}.")
+        return Route(path, dist[target], steps)
@@ -0,0 +1,302 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import uuid
+from engine import ChatEngine
+from sessions import SessionManager
+
+# ====================================================================
+# --- HEADLESS CHAT SERVER ---
+# ====================================================================
+# One asyncio process serving the support, campus and inner-journey
+# flows over plain HTTP (JSON bodies) and WebSocket.
+#
+#   POST /api/support  {"session"?, "message": ...}     -> {"session"?, "reply"}
+#   POST /api/campus   {"message": ...} | {"place": ...} -> {"reply": ...}
+#   POST /api/journey  {"session"?, "message": ...}     -> {"session", "replies", "started"}
+#   GET  /ws           JSON frames {"flow": ..., "message": ...}
+#   GET  /health
+#   GET  /metrics      Prometheus text   (/metrics.json: the same as JSON)
+# Per-user state lives in a SessionManager (LRU + idle expiry); each
+# WebSocket connection is one session, dropped when the socket closes.
+# Support keeps no per-user state, so an HTTP support request only
+# touches a session when it names one - anonymous traffic cannot push
+# journeys in progress out of the LRU.
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_BODY = 64 * 1024
+EXPIRE_INTERVAL = 30.0
+METRICS_DUMP_INTERVAL = 15.0
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class ChatServer:
+    def __init__(self, engine=None, sessions=None):
+        self.engine = engine or ChatEngine()
+        self.sessions = sessions or SessionManager()
+        self.engine.metrics.add_collector(self._collect)
+
+    def _collect(self):
+        for name, value in self.sessions.stats().items():
+            if name == "live":
+                yield "sessions_live", "gauge", (), value
+            else:
+                yield f"sessions_{name}_total", "counter", (), value
+
+    def _session(self, payload, sid, mode):
+        if sid is None:
+            sid = str(payload.get("session") or uuid.uuid4().hex)
+        return self.sessions.get(sid, mode)
+
+    # ---------------------- FLOWS ----------------------
+    async def handle_flow(self, flow, payload, sid=None):
+        message = str(payload.get("message", "")).strip()
+        if flow == "support":
+            if not message:
+                raise HTTPError(400, "message is required")
+            result = {}
+            if sid is not None or payload.get("session"):
+                result["session"] = self._session(payload, sid, "support").sid
+            # history is queued to the background writer, no disk I/O here
+            result["reply"] = self.engine.support_reply(message)
+            return result
+        if flow == "campus":
+            place = payload.get("place")
+            if place:
+                return {"reply": self.engine.place_reply(str(place))}
+            if not message:
+                raise HTTPError(400, "message is required")
+            return {"reply": self.engine.campus_reply(message)}
+        if flow == "journey":
+            session = self._session(payload, sid, "journey")
+            replies = self.engine.journey_reply(session, message)
+            return {"session": session.sid, "replies": replies, "started": session.started}
+        raise HTTPError(404, f"unknown flow: {flow}")
+
+    # ---------------------- HTTP ----------------------
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                    await self._handle_websocket(reader, writer, headers)
+                    break
+                try:
+                    status, result = await self._route(method, path, body)
+                except HTTPError as e:
+                    status, result = e.status, {"error": e.message}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                if isinstance(result, str):
+                    self._write_body(writer, status, result.encode("utf-8"), PROMETHEUS_TYPE, keep_alive)
+                else:
+                    self._write_json(writer, status, result, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except HTTPError as e:
+            self._write_json(writer, e.status, {"error": e.message}, False)
+        finally:
+            writer.close()
+
+    async def _readline(self, reader):
+        try:
+            return await reader.readline()
+        except (asyncio.LimitOverrunError, ValueError):
+            # readline() reports an over-long line as ValueError
+            raise HTTPError(400, "request line or header too long")
+
+    async def _read_request(self, reader):
+        line = await self._readline(reader)
+        if not line:
+            return None
+        try:
+            method, path, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+        headers = {}
+        while True:
+            line = await self._readline(reader)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = headers.get("content-length", "0").strip() or "0"
+        if not (length.isascii() and length.isdigit()):
+            raise HTTPError(400, "invalid Content-Length")
+        length = int(length)
+        if length > MAX_BODY:
+            raise HTTPError(413, "body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path.split("?", 1)[0], headers, body
+
+    async def _route(self, method, path, body):
+        if path == "/health":
+            return 200, {"status": "ok", "sessions": self.sessions.stats()}
+        if path == "/metrics":
+            return 200, self.engine.metrics.prometheus()
+        if path == "/metrics.json":
+            return 200, self.engine.metrics.snapshot()
+        if not path.startswith("/api/"):
+            raise HTTPError(404, "not found")
+        if method != "POST":
+            raise HTTPError(405, "use POST")
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "body must be JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "body must be a JSON object")
+        return 200, await self.handle_flow(path[len("/api/"):], payload)
+
+    def _write_json(self, writer, status, result, keep_alive=True):
+        body = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        self._write_body(writer, status, body, "application/json; charset=utf-8", keep_alive)
+
+    def _write_body(self, writer, status, body, content_type, keep_alive=True):
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+    # ---------------------- WEBSOCKET ----------------------
+    async def _handle_websocket(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            self._write_json(writer, 400, {"error": "missing Sec-WebSocket-Key"}, False)
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+
+        # each socket is one conversation with its own session
+        sid = uuid.uuid4().hex
+        try:
+            await self._websocket_loop(reader, writer, sid)
+        finally:
+            self.sessions.drop(sid)
+
+    async def _websocket_loop(self, reader, writer, sid):
+        while True:
+            opcode, data = await self._read_frame(reader)
+            if opcode == 0x8:
+                self._write_frame(writer, 0x8, data[:2])
+                await writer.drain()
+                return
+            if opcode == 0x9:
+                self._write_frame(writer, 0xA, data)
+            elif opcode == 0x1:
+                try:
+                    payload = json.loads(data.decode("utf-8"))
+                    if not isinstance(payload, dict):
+                        raise HTTPError(400, "frame must be a JSON object")
+                    flow = str(payload.get("flow", "support"))
+                    result = await self.handle_flow(flow, payload, sid)
+                    result["flow"] = flow
+                except ValueError:
+                    result = {"error": "frame must be JSON"}
+                except HTTPError as e:
+                    result = {"error": e.message}
+                self._write_frame(writer, 0x1, json.dumps(result, ensure_ascii=False).encode("utf-8"))
+            await writer.drain()
+
+    async def _read_frame(self, reader):
+        message = b""
+        first_opcode = None
+        while True:
+            b1, b2 = await reader.readexactly(2)
+            fin, opcode = b1 & 0x80, b1 & 0x0F
+            length = b2 & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", await reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", await reader.readexactly(8))[0]
+            if length > MAX_BODY or (opcode < 0x8 and len(message) + length > MAX_BODY):
+                # one frame, or the fragments of one message, too big
+                return 0x8, struct.pack("!H", 1009)
+            mask = await reader.readexactly(4) if b2 & 0x80 else None
+            data = await reader.readexactly(length)
+            if mask:
+                data = bytes(c ^ mask[i % 4] for i, c in enumerate(data))
+            if opcode >= 0x8:
+                # control frames may arrive between fragments
+                return opcode, data
+            if opcode:
+                first_opcode = opcode
+            message += data
+            if fin:
+                return first_opcode, message
+
+    def _write_frame(self, writer, opcode, data):
+        length = len(data)
+        if length < 126:
+            head = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 65536:
+            head = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            head = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        writer.write(head + data)
+
+    async def expire_sessions(self):
+        while True:
+            await asyncio.sleep(EXPIRE_INTERVAL)
+            self.sessions.expire_idle()
+
+    async def dump_metrics(self, path):
+        while True:
+            await asyncio.sleep(METRICS_DUMP_INTERVAL)
+            self.engine.metrics.dump(path)
+
+async def serve(host, port, max_sessions, idle_timeout, spill_file, metrics_file=None):
+    server = ChatServer(sessions=SessionManager(max_sessions, idle_timeout, spill_file))
+    srv = await asyncio.start_server(server.handle_connection, host, port, backlog=4096)
+    tasks = [asyncio.create_task(server.expire_sessions())]
+    if metrics_file:
+        tasks.append(asyncio.create_task(server.dump_metrics(metrics_file)))
+    print(f"PESU chat server listening on {host}:{port}")
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        for task in tasks:
+            task.cancel()
+        server.sessions.close()
+        server.engine.close()
+        if metrics_file:
+            server.engine.metrics.dump(metrics_file)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless PESU chat server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-sessions", type=int, default=100_000)
+    parser.add_argument("--idle-timeout", type=float, default=1800.0, help="seconds")
+    parser.add_argument("--spill-file", help="dbm file for sessions evicted by the LRU limit")
+    parser.add_argument("--metrics-file", help="also dump metrics here as JSON every 15s and on exit")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_sessions, args.idle_timeout, args.spill_file,
+                          args.metrics_file))
+    except KeyboardInterrupt:
+        pass
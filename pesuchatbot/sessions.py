@@ -0,0 +1,149 @@
+import dbm
+import json
+import time
+from collections import OrderedDict
+from engine import JourneyState
+
+# ====================================================================
+# --- SESSION MANAGER ---
+# ====================================================================
+# Per-user conversation state for the server.  Session extends the
+# slotted JourneyState with an id, the current mode and a last-seen
+# time, so a session costs a few small objects and no __dict__.
+# Sessions live in an OrderedDict kept in least-recently-used order:
+#   - past `max_sessions`, the least recently used session is evicted
+#     (and spilled to disk first when a spill file is configured)
+#   - sessions idle longer than `idle_timeout` seconds are dropped
+# Since every access moves a session to the end, the idle ones are
+# always at the front and expiry never scans live sessions.  Spilled
+# sessions that are never asked for again are purged from the spill
+# file by expiry, at most once per `idle_timeout`.
+
+MODES = ("support", "campus", "journey")
+
+class Session(JourneyState):
+    __slots__ = ("sid", "mode", "last_seen")
+
+    def __init__(self, sid, mode="support"):
+        super().__init__()
+        self.sid = sid
+        self.mode = mode
+        self.last_seen = 0.0
+
+    def dump(self):
+        return json.dumps([self.mode, self.started, self.stage, list(self.answers), time.time()])
+
+    @classmethod
+    def load(cls, sid, raw):
+        mode, started, stage, answers, saved_at = json.loads(raw)
+        session = cls(sid, mode)
+        session.started = started
+        session.stage = stage
+        session.answers = tuple(answers)
+        return session, saved_at
+
+class SessionManager:
+    def __init__(self, max_sessions=100_000, idle_timeout=1800.0, spill_file=None, clock=time.monotonic):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.spilled = 0
+        self.restored = 0
+        self.purged = 0
+        self._next_purge = clock() + idle_timeout
+        self._sessions = OrderedDict()
+        self._spill = dbm.open(spill_file, "c") if spill_file else None
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, sid):
+        return sid in self._sessions
+
+    def get(self, sid, mode=None):
+        # Returns the session for `sid`, restoring or creating it.
+        now = self.clock()
+        session = self._sessions.get(sid)
+        if session is not None:
+            self._sessions.move_to_end(sid)
+        else:
+            session = self._restore(sid)
+            if session is None:
+                session = Session(sid, mode or "support")
+                self.created += 1
+            self._sessions[sid] = session
+            if len(self._sessions) > self.max_sessions:
+                self._evict_lru()
+        session.last_seen = now
+        if mode is not None and mode != session.mode:
+            session.mode = mode
+        return session
+
+    def drop(self, sid):
+        self._sessions.pop(sid, None)
+        if self._spill is not None and sid in self._spill:
+            del self._spill[sid]
+
+    def expire_idle(self):
+        # Drops sessions idle past the timeout; returns how many.
+        cutoff = self.clock() - self.idle_timeout
+        dropped = 0
+        while self._sessions:
+            sid, session = next(iter(self._sessions.items()))
+            if session.last_seen > cutoff:
+                break
+            self._sessions.popitem(last=False)
+            dropped += 1
+        self.expired += dropped
+        if self._spill is not None and self.clock() >= self._next_purge:
+            self._next_purge = self.clock() + self.idle_timeout
+            self._purge_spill()
+        return dropped
+
+    def _purge_spill(self):
+        # drops spilled sessions too old to be restored
+        cutoff = time.time() - self.idle_timeout
+        stale = [sid for sid in self._spill.keys() if json.loads(self._spill[sid])[-1] < cutoff]
+        for sid in stale:
+            del self._spill[sid]
+        if stale and hasattr(self._spill, "reorganize"):
+            self._spill.reorganize()   # gdbm: give the freed space back
+        self.purged += len(stale)
+
+    def _evict_lru(self):
+        sid, session = self._sessions.popitem(last=False)
+        self.evicted += 1
+        # only a journey in progress has state worth keeping
+        if self._spill is not None and session.started:
+            self._spill[sid] = session.dump()
+            self.spilled += 1
+
+    def _restore(self, sid):
+        if self._spill is None or sid not in self._spill:
+            return None
+        raw = self._spill[sid]
+        del self._spill[sid]
+        session, saved_at = Session.load(sid, raw)
+        if time.time() - saved_at > self.idle_timeout:
+            return None
+        self.restored += 1
+        return session
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def stats(self):
+        return {
+            "live": len(self._sessions),
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "spilled": self.spilled,
+            "restored": self.restored,
+            "purged": self.purged,
+        }
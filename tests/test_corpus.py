@@ -0,0 +1,89 @@
+import os
+import random
+from corpus import CompiledMatcher, corpus_path, open_corpus, source_signature, write_corpus
+from engine import build_response_table, compile_responses, load_response_table, response_tiers
+from matcher import ResponseMatcher
+from test_matcher import ALPHABET, naive_findall, naive_match, random_tiers, random_word
+
+def compiled(tmp_path, tiers):
+    # writes tiers (last one = the file tier) and maps the artifact back
+    source = tmp_path / "responses.txt"
+    source.write_text("placeholder\n", encoding="utf-8")
+    path = str(tmp_path / "responses.txt.corpus")
+    write_corpus(path, ResponseMatcher(tiers), source_signature(str(source)))
+    return path, str(source)
+
+def test_random_round_trip(tmp_path):
+    rng = random.Random(4321)
+    for _ in range(100):
+        tiers = random_tiers(rng) + [{random_word(rng, ALPHABET, 1, 4): [f"file {i}", "x"] for i in range(rng.randint(0, 5))}]
+        path, source = compiled(tmp_path, tiers)
+        responses, matcher = open_corpus(path, source, tiers[:-1])
+        assert isinstance(matcher, CompiledMatcher)
+        assert dict(responses) == {k: v[0] for k, v in tiers[-1].items()}
+        memory = ResponseMatcher(tiers)
+        for _ in range(20):
+            text = random_word(rng, ALPHABET + "ABCÉ!?.xyz", 0, 30)
+            lower = text.lower()
+            want = naive_match(tiers, lower)
+            assert matcher.match(lower) == want
+            assert matcher.match(matcher.normalize(text)) == want
+            assert matcher.normalize(text) == memory.normalize(text)
+            assert matcher.findall(lower) == naive_findall(tiers, lower)
+            assert matcher.resolve(lower) == memory.resolve(lower)
+
+def test_compile_responses_file(tmp_path):
+    source = tmp_path / "responses.txt"
+    source.write_text("stress:Breathe.\nexam:One step at a time.\ncafé:Coffee ☕\n", encoding="utf-8")
+    filename = str(source)
+    compile_responses(filename)
+    responses, matcher = load_response_table(filename)
+    assert isinstance(matcher, CompiledMatcher)
+    parsed, memory = build_response_table(filename)
+    assert dict(responses) == dict(parsed)
+    assert responses["café"] == "Coffee ☕"
+    assert "missing" not in responses
+    for text in ["exam stress", "the café", "I am happy", "nothing", ""]:
+        assert matcher.resolve(text) == memory.resolve(text)
+
+def test_stale_or_broken_artifact(tmp_path):
+    tiers = response_tiers({"exam": "file exam"})
+    path, source = compiled(tmp_path, tiers)
+    builtin = tiers[:-1]
+    assert open_corpus(path, source, builtin) is not None
+
+    # the built-in tiers changed since compiling
+    changed = [dict(tier) for tier in builtin]
+    changed[0]["joy"] = ["new"]
+    assert open_corpus(path, source, changed) is None
+
+    # the source file was touched or edited
+    st = os.stat(source)
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert open_corpus(path, source, builtin) is None
+    path, source = compiled(tmp_path, tiers)
+    with open(source, "a", encoding="utf-8") as f:
+        f.write("more\n")
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert open_corpus(path, source, builtin) is None
+
+    # missing, empty, truncated and corrupt artifacts
+    path, source = compiled(tmp_path, tiers)
+    data = open(path, "rb").read()
+    os.remove(path)
+    assert open_corpus(path, source, builtin) is None
+    for broken in (b"", data[:40], data[:len(data) // 2], b"NOTACORP" + data[8:]):
+        with open(path, "wb") as f:
+            f.write(broken)
+        assert open_corpus(path, source, builtin) is None
+
+def test_load_falls_back_to_text(tmp_path):
+    source = tmp_path / "responses.txt"
+    source.write_text("exam:One step at a time.\n", encoding="utf-8")
+    filename = str(source)
+    compile_responses(filename)
+    source.write_text("exam:Changed.\nlonely:You matter.\n", encoding="utf-8")
+    responses, matcher = load_response_table(filename)
+    assert not isinstance(matcher, CompiledMatcher)
+    assert dict(responses) == {"exam": "Changed.", "lonely": "You matter."}
+    assert os.path.exists(corpus_path(filename))
@@ -0,0 +1,64 @@
+import random
+from engine import cached_matcher, get_response, response_tiers
+from matcher import ResponseMatcher
+
+# ResponseMatcher must give the answer of the chain of `key in text`
+# loops it replaced: lower tier first, then dict order inside a tier.
+
+ALPHABET = "abcé -"
+
+def naive_match(tiers, text):
+    for t, tier in enumerate(tiers):
+        for key in tier:
+            if key in text:
+                return t, key
+    return None
+
+def naive_findall(tiers, text):
+    return {(t, key) for t, tier in enumerate(tiers) for key in tier if key in text}
+
+def random_word(rng, alphabet, lo, hi):
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(lo, hi)))
+
+def random_tiers(rng):
+    tiers = []
+    for t in range(rng.randint(1, 4)):
+        tier = {}
+        for r in range(rng.randint(0, 6)):
+            # empty and repeated keys included on purpose
+            tier[random_word(rng, ALPHABET, 0 if rng.random() < 0.05 else 1, 4)] = [f"reply {t}.{r}"]
+        tiers.append(tier)
+    return tiers
+
+def test_random_equivalence():
+    rng = random.Random(1234)
+    for _ in range(300):
+        tiers = random_tiers(rng)
+        matcher = ResponseMatcher(tiers)
+        for _ in range(20):
+            text = random_word(rng, ALPHABET + "ABCÉ!?.xyz", 0, 30)
+            lower = text.lower()
+            want = naive_match(tiers, lower)
+            assert matcher.match(lower) == want
+            assert matcher.match(matcher.normalize(text)) == want
+            assert matcher.findall(lower) == naive_findall(tiers, lower)
+            hit = matcher.resolve(lower)
+            assert hit == (None if want is None else (want[0], tiers[want[0]][want[1]]))
+            assert matcher.candidates(lower) == (None if hit is None else hit[1])
+
+def test_builtin_tiers():
+    tiers = response_tiers({"stress": "file stress", "exam": "file exam", "hi there": "file hi"})
+    matcher = ResponseMatcher(tiers)
+    for text in ["I am so stressed about the exam", "hi there", "nothing much", "GOOD but sad",
+                 "thanks, bye!", "", "exam", "Happy?!"]:
+        assert matcher.match(text.lower()) == naive_match(tiers, text.lower())
+        assert matcher.match(matcher.normalize(text)) == naive_match(tiers, text.lower())
+
+def test_get_response_reuses_matcher():
+    responses = {"exam": "file exam", "lonely": "file lonely"}
+    assert get_response("exam tomorrow", responses) == "file exam"
+    matcher = cached_matcher(responses)
+    assert cached_matcher(dict(responses)) is matcher
+    responses["exam"] = "changed"
+    assert cached_matcher(responses) is not matcher
+    assert get_response("exam tomorrow", responses) == "changed"
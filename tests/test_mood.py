@@ -0,0 +1,26 @@
+from mood import UNKNOWN, MoodModel, classify_moods
+
+FILE = {"exam": "Take it one step at a time.", "lonely": "Remember you matter.", "sad": "Be kind to yourself."}
+
+def labels(messages):
+    return [label for label, _ in classify_moods(messages, MoodModel.from_tables(FILE))]
+
+def test_whole_word_keywords():
+    assert labels(["I hit my head", "his phone died", "this is nothing", "goodbye everyone"]) == [UNKNOWN] * 4
+    assert labels(["hi there", "so stressed", "exams again", "Good!"]) == ["neutral", "negative", "negative", "positive"]
+
+def test_file_key_moods():
+    assert labels(["I feel so lonely"]) == ["negative"]
+    model = MoodModel.from_tables(FILE, {"lonely": "neutral"})
+    assert model.classify(["I feel so lonely"])[0] == ["neutral"]
+
+def test_confidence_reflects_evidence():
+    result = classify_moods(["what is the time", "sad", "sad and tired, so stressed"], MoodModel.from_tables(FILE))
+    assert result[0][0] == UNKNOWN
+    assert 0.5 < result[1][1] < result[2][1] < 1.0
+
+def test_batch_matches_single_messages():
+    model = MoodModel.from_tables(FILE)
+    messages = ["", "sad", "nothing", "hello\nI am happy", "exam\x00stress", "TIRED"]
+    batch = model.classify(messages)[0]
+    assert batch == [model.classify([m])[0][0] for m in messages]